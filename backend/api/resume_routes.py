@@ -5,6 +5,7 @@ API routes for resume analysis
 from fastapi import APIRouter, HTTPException, UploadFile, File
 from services.resume_service import ResumeAnalysisService
 from models.schemas import ResumeAnalysisResponse
+from utils.executors import run_blocking, ExecutorSaturatedError
 
 router = APIRouter()
 resume_service = ResumeAnalysisService()
@@ -40,12 +41,14 @@ async def analyze_resume(file: UploadFile = File(...)):
         if len(file_content) == 0:
             raise HTTPException(status_code=400, detail="File is empty")
         
-        # Analyze resume
-        analysis = resume_service.analyze_resume(file_content, file.filename)
+        # Analyze resume (parsing and matching are CPU-bound: keep them off the event loop)
+        analysis = await run_blocking("resume", resume_service.analyze_resume, file_content, file.filename)
         
         return analysis
     except HTTPException:
         raise
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing resume: {str(e)}")
 
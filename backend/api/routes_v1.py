@@ -2,41 +2,82 @@
 V1 API routes for job market analytics
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Literal
 from services.analytics_service import AnalyticsService
-from services.forecast_service import ForecastService
+from services.forecast_service import ForecastService, UnknownLocationError
+from utils.job_store import get_job_store
+from utils.response_cache import get_response_cache
+from utils.forecast_cache import get_forecast_cache
+from services.precompute_service import get_precompute_service
+from utils.embedding_cache import embedding_cache_stats
+from utils.engine_registry import readiness
+from utils.executors import run_blocking, executor_stats, ExecutorSaturatedError
 from models.schemas import (
-    TopSkill, LocationSkill, SkillForecastRequest, SkillForecastResponse
+    TopSkill, LocationSkill, SkillForecastRequest, SkillForecastResponse, SkillHistoryResponse,
+    SkillForecastBatchRequest, SkillLocationForecastResponse
 )
 
 router = APIRouter()
 analytics_service = AnalyticsService()
 forecast_service = ForecastService()
+response_cache = get_response_cache()
 
 @router.get("/skills/top", response_model=List[TopSkill])
-async def get_top_skills(limit: int = Query(default=20, ge=1, le=100)):
+async def get_top_skills(
+    limit: int = Query(default=20, ge=1, le=100),
+    location: Optional[str] = Query(default=None, description="Count postings in this location only"),
+    since: Optional[str] = Query(default=None, description="Count postings from this month (YYYY-MM) on")
+):
     """
     Get top skills by frequency in job postings
     
     - **limit**: Number of top skills to return (1-100)
+    - **location**: Only postings in this location (optional; no skills if it has no postings)
+    - **since**: Only postings from this month on, as YYYY-MM (optional)
     """
     try:
-        skills = analytics_service.get_top_skills(limit=limit)
+        params = {"limit": limit, "location": location, "since": since}
+        skills = response_cache.get_or_compute(
+            "skills/top", params,
+            lambda: analytics_service.get_top_skills(**params)
+        )
         return skills
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching top skills: {str(e)}")
 
 @router.get("/skills/by-location", response_model=List[LocationSkill])
-async def get_skills_by_location(limit_per_location: int = Query(default=10, ge=1, le=50)):
+async def get_skills_by_location(
+    response: Response,
+    limit_per_location: int = Query(default=10, ge=1, le=50),
+    locations: Optional[List[str]] = Query(default=None),
+    offset: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000)
+):
     """
     Get skills grouped by location
     
     - **limit_per_location**: Number of top skills per location (1-50)
+    - **locations**: Only these locations (repeat the parameter for several; names contain commas)
+    - **offset**: Number of locations to skip
+    - **limit**: Maximum number of locations to return (all if omitted)
+    
+    The total number of matching locations is returned in the X-Total-Count header.
     """
     try:
-        location_skills = analytics_service.get_skills_by_location(limit_per_location=limit_per_location)
-        return location_skills
+        params = {"limit_per_location": limit_per_location, "locations": locations,
+                  "offset": offset, "limit": limit}
+        page = response_cache.get_or_compute(
+            "skills/by-location", params,
+            lambda: analytics_service.get_location_skill_page(**params)
+        )
+        response.headers["X-Total-Count"] = str(page["total"])
+        return page["locations"]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching location skills: {str(e)}")
 
@@ -47,30 +88,213 @@ async def forecast_skill_demand(request: SkillForecastRequest):
     
     - **skill**: Skill name to forecast
     - **months**: Forecast horizon in months (1-24)
+    - **engine**: "prophet" or "fast" (vectorized damped-trend smoothing)
+    - **resolution**: "day", "week" or "month" (predictions averaged per period)
+    - **layout**: "rows" (one object per date) or "columns" (parallel arrays)
+    - **location**: Forecast demand in this location only (optional; 404 if it has no postings)
     """
     try:
-        forecast = forecast_service.forecast_skill_demand(
+        # Fitting is CPU-bound: run it on the forecast executor, not the event loop
+        forecast = await run_blocking(
+            "forecast", forecast_service.forecast_skill_demand,
             skill=request.skill,
-            months=request.months
+            months=request.months,
+            engine=request.engine,
+            resolution=request.resolution,
+            layout=request.layout,
+            location=request.location
         )
         return forecast
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UnknownLocationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error forecasting skill demand: {str(e)}")
 
 @router.get("/skills/forecast", response_model=SkillForecastResponse)
 async def forecast_skill_demand_get(
     skill: str = Query(..., description="Skill name to forecast"),
-    months: int = Query(default=6, ge=1, le=24, description="Forecast horizon in months")
+    months: int = Query(default=6, ge=1, le=24, description="Forecast horizon in months"),
+    engine: Optional[Literal["prophet", "fast"]] = Query(default=None, description="Forecast engine"),
+    resolution: Literal["day", "week", "month"] = Query(default="day", description="Prediction resolution"),
+    layout: Literal["rows", "columns"] = Query(default="rows", description="Response layout"),
+    location: Optional[str] = Query(default=None, description="Forecast demand in this location only")
 ):
     """
     Forecast future demand for a skill (GET version)
     
     - **skill**: Skill name to forecast
     - **months**: Forecast horizon in months (1-24)
+    - **engine**: "prophet" or "fast" (defaults to M2M_FORECAST_ENGINE)
+    - **resolution**: "day", "week" or "month" (predictions averaged per period)
+    - **layout**: "rows" (one object per date) or "columns" (parallel arrays)
+    - **location**: Forecast demand in this location only (optional; 404 if it has no postings)
     """
     try:
-        forecast = forecast_service.forecast_skill_demand(skill=skill, months=months)
+        forecast = await run_blocking(
+            "forecast", forecast_service.forecast_skill_demand, skill=skill, months=months, engine=engine,
+            resolution=resolution, layout=layout, location=location
+        )
         return forecast
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UnknownLocationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error forecasting skill demand: {str(e)}")
+
+@router.post("/skills/forecast/batch")
+async def forecast_skill_demand_batch(request: SkillForecastBatchRequest):
+    """
+    Forecast several skills at once, streamed as newline-delimited JSON
+    
+    Uncached fits run in parallel on a process pool (M2M_FORECAST_WORKERS).
+    Each line is {"skill", "cached", "seconds", "forecast"} and is sent as
+    soon as that skill's forecast completes, so lines arrive out of request order.
+    
+    - **skills**: Skill names to forecast
+    - **months**: Forecast horizon in months (1-24)
+    - **engine**: "prophet" or "fast"; the fast engine fits the whole batch in one vectorized pass
+    - **resolution**, **layout**, **location**: as for /skills/forecast
+    """
+    try:
+        futures = await run_blocking(
+            "forecast", forecast_service.forecast_batch,
+            request.skills, months=request.months, engine=request.engine,
+            resolution=request.resolution, layout=request.layout, location=request.location
+        )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UnknownLocationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error forecasting skill demand: {str(e)}")
+    
+    async def stream_results():
+        for result in asyncio.as_completed([asyncio.wrap_future(f) for f in futures]):
+            yield json.dumps(await result) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+@router.get("/skills/forecast/locations", response_model=SkillLocationForecastResponse)
+async def forecast_skill_demand_by_location(
+    skill: Optional[str] = Query(default=None, description="Skill to forecast (all skills if omitted)"),
+    months: int = Query(default=6, ge=1, le=24, description="Forecast horizon in months"),
+    locations: Optional[List[str]] = Query(default=None, description="Only these locations (repeat the parameter)"),
+    limit: int = Query(default=50, ge=1, le=5000, description="Maximum number of series returned"),
+    resolution: Literal["day", "week", "month"] = Query(default="month", description="Prediction resolution"),
+    layout: Literal["rows", "columns"] = Query(default="columns", description="Response layout")
+):
+    """
+    Forecast demand per (skill, location) series, busiest series first
+    
+    All series are fitted together with the fast engine on the skill x
+    location x month counts, so one call covers every location of a
+    skill, or every series in the data when no skill is given.
+    
+    - **skill**: Skill to forecast; omit to forecast every (skill, location) series
+    - **months**: Forecast horizon in months (1-24)
+    - **locations**: Restrict to these locations (optional)
+    - **limit**: Maximum number of series returned; `total` counts all of them
+    - **resolution**, **layout**: as for /skills/forecast (monthly columns by default)
+    """
+    try:
+        return await run_blocking(
+            "forecast", forecast_service.forecast_locations, skill=skill, months=months,
+            resolution=resolution, layout=layout, locations=locations, limit=limit
+        )
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error forecasting skill demand by location: {str(e)}")
+
+@router.get("/skills/history", response_model=SkillHistoryResponse)
+async def compare_skill_histories(
+    skills: List[str] = Query(..., description="Skills to compare (repeat the parameter)"),
+    location: Optional[str] = Query(default=None, description="Count postings in this location only"),
+    since: Optional[str] = Query(default=None, description="Start the history at this month (YYYY-MM)")
+):
+    """
+    Compare monthly demand history of several skills
+    
+    - **skills**: Skill names or aliases; each series has one count per month in `months`
+    - **location**: Only postings in this location (optional; 404 if it has no postings)
+    - **since**: First month of the history, as YYYY-MM (optional)
+    """
+    try:
+        params = {"skills": skills, "location": location, "since": since}
+        return response_cache.get_or_compute(
+            "skills/history", params,
+            lambda: forecast_service.compare_skill_histories(**params)
+        )
+    except UnknownLocationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching skill history: {str(e)}")
+
+@router.get("/data/stats")
+async def get_data_stats():
+    """
+    Report the shared job dataset's size, load time and memory footprint
+    """
+    try:
+        return get_job_store().stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching data stats: {str(e)}")
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Report hit/miss counts and size of the analytics response, forecast
+    and phrase embedding caches, and the progress of forecast precomputation
+    """
+    try:
+        return {
+            "responses": response_cache.stats(),
+            "forecasts": get_forecast_cache().stats(),
+            "embeddings": embedding_cache_stats(),
+            "precompute": get_precompute_service().stats()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching cache stats: {str(e)}")
 
+@router.get("/ready")
+async def get_readiness():
+    """
+    Report which heavy engines (Prophet, the embedding model) are loaded
+    
+    The API serves requests while engines warm up in the background; `ready`
+    turns true once every engine has loaded or failed to. Also reports the
+    warm-up progress and how long the app modules and engines took to import.
+    """
+    try:
+        return readiness()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching readiness: {str(e)}")
+
+@router.get("/executors/stats")
+async def get_executor_stats():
+    """
+    Report concurrency limits, queue depth and timing of the executors heavy endpoints run on
+    """
+    try:
+        return executor_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching executor stats: {str(e)}")
+
+@router.post("/data/reload")
+async def reload_data():
+    """
+    Ingest postings added to the CSV or database since the last load
+    
+    Only the new rows are processed; the new data version is swapped in atomically.
+    """
+    try:
+        return await run_blocking("reload", get_job_store().refresh)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reloading job data: {str(e)}")
@@ -2,35 +2,89 @@
 V2 API routes for emerging skills and roadmap generation
 """
 
+import asyncio
+import json
+from concurrent.futures import as_completed
 from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Callable, Literal, Optional
 from services.emerging_skills_service import EmergingSkillsService
+from services.forecast_service import ForecastService, UnknownLocationError
 from services.roadmap_service import RoadmapService
+from utils.executors import get_executor, run_blocking, ExecutorSaturatedError
+from utils.task_manager import get_task_manager, TERMINAL_STATUSES
 from models.schemas import (
     EmergingSkillsResponse, EmergingSkill,
-    SkillRoadmapResponse
+    SkillRoadmapResponse, SkillForecastBatchRequest, TaskStatus
 )
 
 router = APIRouter()
 emerging_skills_service = EmergingSkillsService()
+forecast_service = ForecastService()
 roadmap_service = RoadmapService()
+task_manager = get_task_manager()
+
+def _run_emerging_skills(params: Dict[str, Any], report: Callable[[float, str], None]) -> Dict[str, Any]:
+    report(0.0, "Detecting emerging skills")
+    # Same executor as GET /skills/emerging: it serializes access to the service's phrase caches
+    result = get_executor("emerging").run_sync(emerging_skills_service.detect, **params)
+    return {
+        "emerging_skills": result["emerging_skills"],
+        "total_candidates": len(result["emerging_skills"]),
+        "metadata": result["metadata"]
+    }
+
+def _run_forecast_batch(params: Dict[str, Any], report: Callable[[float, str], None]) -> Dict[str, Any]:
+    futures = forecast_service.forecast_batch(params["skills"], months=params["months"],
+                                              engine=params.get("engine"),
+                                              resolution=params.get("resolution", "day"),
+                                              layout=params.get("layout", "rows"),
+                                              location=params.get("location"))
+    for done, _ in enumerate(as_completed(futures), 1):
+        report(done / len(futures), f"{done}/{len(futures)} skills forecast")
+    return {"forecasts": [future.result() for future in futures]}
+
+task_manager.register("emerging_skills", _run_emerging_skills)
+task_manager.register("forecast_batch", _run_forecast_batch)
 
 @router.get("/skills/emerging", response_model=EmergingSkillsResponse)
-async def get_emerging_skills(min_cluster_size: int = Query(default=3, ge=2, le=10)):
+async def get_emerging_skills(
+    min_cluster_size: int = Query(default=3, ge=2, le=10),
+    method: Optional[Literal["kmeans", "minibatch", "density"]] = Query(default=None, description="Clustering method"),
+    n_clusters: Optional[int] = Query(default=None, ge=2, le=5000, description="Number of k-means clusters"),
+    window: Optional[int] = Query(default=None, ge=1, le=24, description="Recent months scored"),
+    baseline: Optional[int] = Query(default=None, ge=1, le=60, description="Months compared against")
+):
     """
     Detect emerging skills from job descriptions
     
     Uses NLP (sentence embeddings) and clustering to identify emerging skills
     - **min_cluster_size**: Minimum cluster size for skill detection (2-10)
+    - **method**: "kmeans", "minibatch" (mini-batch k-means) or "density" (HDBSCAN,
+      which finds the number of clusters itself); defaults to M2M_CLUSTERING
+    - **n_clusters**: Cluster count for the k-means methods; chosen automatically if omitted
+    - **window**: Months treated as recent (defaults to M2M_EMERGENCE_WINDOW)
+    - **baseline**: Months before the window that recent mentions are compared with
+      (defaults to M2M_EMERGENCE_BASELINE)
+    
+    Skills are ranked by how far their share of recent postings bursts above
+    the baseline. `metadata` reports the method used, cluster counts, the
+    periods compared and seconds spent per stage.
     """
     try:
-        emerging_skills = emerging_skills_service.detect_emerging_skills(
-            min_cluster_size=min_cluster_size
+        # Embedding and clustering are CPU-bound: keep them off the event loop
+        result = await run_blocking(
+            "emerging", emerging_skills_service.detect,
+            min_cluster_size=min_cluster_size, method=method, n_clusters=n_clusters,
+            window=window, baseline=baseline
         )
         return {
-            "emerging_skills": emerging_skills,
-            "total_candidates": len(emerging_skills)
+            "emerging_skills": result["emerging_skills"],
+            "total_candidates": len(result["emerging_skills"]),
+            "metadata": result["metadata"]
         }
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting emerging skills: {str(e)}")
 
@@ -54,3 +108,127 @@ async def get_skill_roadmap(skill: str = Query(..., description="Skill name for
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating roadmap: {str(e)}")
 
+
+# -------------------------
+# BACKGROUND TASKS
+# -------------------------
+@router.post("/tasks/emerging-skills", response_model=TaskStatus, status_code=202)
+async def submit_emerging_skills_task(
+    min_cluster_size: int = Query(default=3, ge=2, le=10),
+    method: Optional[Literal["kmeans", "minibatch", "density"]] = Query(default=None, description="Clustering method"),
+    n_clusters: Optional[int] = Query(default=None, ge=2, le=5000, description="Number of k-means clusters"),
+    window: Optional[int] = Query(default=None, ge=1, le=24, description="Recent months scored"),
+    baseline: Optional[int] = Query(default=None, ge=1, le=60, description="Months compared against")
+):
+    """
+    Start emerging skill detection in the background and return its task
+    
+    Parameters are those of GET /skills/emerging. Poll GET /tasks/{id} (or
+    stream /tasks/{id}/events) and fetch the result from /tasks/{id}/result.
+    Identical requests on the same data return the existing task instead of
+    starting a new one.
+    """
+    try:
+        return await run_blocking("tasks", task_manager.submit, "emerging_skills",
+                                  {"min_cluster_size": min_cluster_size, "method": method,
+                                   "n_clusters": n_clusters, "window": window, "baseline": baseline})
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting task: {str(e)}")
+
+@router.post("/tasks/forecast-batch", response_model=TaskStatus, status_code=202)
+async def submit_forecast_batch_task(request: SkillForecastBatchRequest):
+    """
+    Start a multi-skill forecast in the background and return its task
+    
+    The result is {"forecasts": [...]} in request order, each item as in
+    /api/v1/skills/forecast/batch.
+    """
+    try:
+        # Reject an unknown location now rather than as a failed task
+        forecast_service.resolve_location(request.location)
+        return await run_blocking("tasks", task_manager.submit, "forecast_batch", request.model_dump())
+    except UnknownLocationError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting task: {str(e)}")
+
+@router.get("/tasks")
+async def get_task_stats():
+    """
+    Report task worker count, queue depth and tasks per status
+    """
+    try:
+        return await run_blocking("tasks", task_manager.stats)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching task stats: {str(e)}")
+
+@router.get("/tasks/{task_id}", response_model=TaskStatus)
+async def get_task_status(task_id: str):
+    """
+    Get a background task's status and progress
+    """
+    try:
+        status = await run_blocking("tasks", task_manager.status, task_id)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    return status
+
+@router.get("/tasks/{task_id}/result")
+async def get_task_result(task_id: str):
+    """
+    Get a finished task's result (409 while it is queued or running)
+    """
+    try:
+        status = await run_blocking("tasks", task_manager.status, task_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+        if status["status"] == "failed":
+            raise HTTPException(status_code=500, detail=f"Task failed: {status['error']}")
+        if status["status"] != "done":
+            raise HTTPException(status_code=409, detail=f"Task is {status['status']}")
+        return await run_blocking("tasks", task_manager.result, task_id)
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/tasks/{task_id}/events")
+async def stream_task_events(task_id: str):
+    """
+    Stream a task's status as Server-Sent Events until it finishes
+    
+    An event is sent whenever status, progress or message change; the
+    last one has status "done" or "failed". If the server is too busy to
+    poll the task, an "error" event is sent and the stream ends; reconnect
+    to resume.
+    """
+    try:
+        if await run_blocking("tasks", task_manager.status, task_id) is None:
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+    except ExecutorSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    async def events():
+        last = None
+        while True:
+            try:
+                status = await run_blocking("tasks", task_manager.status, task_id)
+            except ExecutorSaturatedError as e:
+                yield f"event: error\ndata: {json.dumps({'status_code': 503, 'detail': str(e)})}\n\n"
+                return
+            current = (status["status"], status["progress"], status["message"])
+            if current != last:
+                last = current
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+            if status["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(0.5)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
@@ -1,12 +1,50 @@
+import time
+_boot_start = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 
-from api import routes_v1, routes_v2, resume_routes
+from utils.engine_registry import timed_import, import_times, start_warmup
+# Heavy libraries (Prophet, sentence-transformers, scikit-learn) are imported on
+# first use or by the warm-up, so importing the routes stays light; timed for the startup log
+routes_v1 = timed_import("api.routes_v1")
+routes_v2 = timed_import("api.routes_v2")
+resume_routes = timed_import("api.resume_routes")
+from utils.job_store import get_job_store
+from services.forecast_service import shutdown_forecast_pool
+from utils.executors import shutdown_executors
+from utils.task_manager import get_task_manager
+from services.precompute_service import get_precompute_service
 
 app = FastAPI(title="Mind2Market")
 
+# -------------------------
+# BACKGROUND DATA REFRESH
+# -------------------------
+@app.on_event("startup")
+def start_job_data_watcher():
+    # Picks up new postings without restarting workers (M2M_RELOAD_INTERVAL=0 disables)
+    get_job_store().start_watcher()
+    # Resume background tasks a previous process left queued or running
+    get_task_manager().start()
+    # Fit top-skill forecasts in the background now and after every reload
+    get_precompute_service().start()
+    # Load Prophet and the embedding model once the server is accepting requests
+    start_warmup()
+    print(f"Startup: app imported in {time.perf_counter() - _boot_start:.2f}s ("
+          + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in import_times().items()) + ")")
+
+
+@app.on_event("shutdown")
+def stop_job_data_watcher():
+    get_job_store().stop_watcher()
+    get_precompute_service().stop()
+    shutdown_forecast_pool()
+    shutdown_executors()
+    get_task_manager().stop()
+
 # -------------------------
 # API ROUTES
 # -------------------------
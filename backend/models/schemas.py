@@ -3,7 +3,7 @@ Pydantic models for request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal, Union
 from datetime import datetime
 
 # V1 Analytics Models
@@ -19,14 +19,48 @@ class LocationSkill(BaseModel):
 class SkillForecastRequest(BaseModel):
     skill: str
     months: int = Field(default=6, ge=1, le=24, description="Forecast horizon in months")
+    engine: Optional[Literal["prophet", "fast"]] = Field(default=None, description="Forecast engine (defaults to M2M_FORECAST_ENGINE)")
+    resolution: Literal["day", "week", "month"] = Field(default="day", description="Average predictions per day, week or month")
+    layout: Literal["rows", "columns"] = Field(default="rows", description="One object per date, or parallel arrays")
+    location: Optional[str] = Field(default=None, description="Forecast demand in this location only")
+
+class SkillForecastBatchRequest(BaseModel):
+    skills: List[str] = Field(..., min_length=1, max_length=500, description="Skills to forecast")
+    months: int = Field(default=6, ge=1, le=24, description="Forecast horizon in months")
+    engine: Optional[Literal["prophet", "fast"]] = Field(default=None, description="Forecast engine (defaults to M2M_FORECAST_ENGINE)")
+    resolution: Literal["day", "week", "month"] = Field(default="day", description="Average predictions per day, week or month")
+    layout: Literal["rows", "columns"] = Field(default="rows", description="One object per date, or parallel arrays")
+    location: Optional[str] = Field(default=None, description="Forecast demand in this location only")
+
+class ForecastColumns(BaseModel):
+    dates: List[str]
+    predicted: List[float]
+    lower_bound: List[float]
+    upper_bound: List[float]
 
 class SkillForecastResponse(BaseModel):
     skill: str
-    forecast_data: List[Dict[str, Any]]
+    forecast_data: Union[ForecastColumns, List[Dict[str, Any]]]
     trend: str
     current_demand: float
     predicted_demand: float
     change_percentage: float
+    location: Optional[str] = None
+
+class SkillLocationForecastResponse(BaseModel):
+    skill: Optional[str] = None
+    total: int
+    forecasts: List[SkillForecastResponse]
+
+class SkillHistorySeries(BaseModel):
+    skill: str
+    canonical: Optional[str] = None
+    counts: List[int]
+    total: int
+
+class SkillHistoryResponse(BaseModel):
+    months: List[str]
+    series: List[SkillHistorySeries]
 
 # V2 Emerging Skills Models
 class EmergingSkill(BaseModel):
@@ -34,10 +68,33 @@ class EmergingSkill(BaseModel):
     confidence_score: float
     frequency: int
     trend: str
+    # Mentions in the recent and baseline windows and how they compare
+    recent_mentions: Optional[int] = None
+    baseline_mentions: Optional[int] = None
+    growth: Optional[float] = None
+    burst_score: Optional[float] = None
+    acceleration: Optional[float] = None
 
 class EmergingSkillsResponse(BaseModel):
     emerging_skills: List[EmergingSkill]
     total_candidates: int
+    # Clustering method, phrase and cluster counts, and seconds per stage
+    metadata: Optional[Dict[str, Any]] = None
+
+# V2 Background Task Models
+class TaskStatus(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, done, failed
+    params: Dict[str, Any]
+    data_fingerprint: Optional[str] = None
+    progress: float
+    message: Optional[str] = None
+    error: Optional[str] = None
+    queue_position: Optional[int] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
 
 # V2 Roadmap Models
 class LearningStage(BaseModel):
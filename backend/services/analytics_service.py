@@ -2,110 +2,171 @@
 Analytics service for job market data analysis
 """
 
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Any, Optional
-from collections import Counter
-from utils.data_loader import get_all_jobs
+from utils import job_db
+from utils.data_loader import get_db_connection
+from utils.ingest import parse_month
+from utils.job_store import JobData, get_job_store
+from utils.skill_matrix import SkillMatrix
+from utils.skill_taxonomy import get_skill_taxonomy
 
 class AnalyticsService:
     """Service for analyzing job market data"""
     
     def __init__(self):
-        self.jobs_df = get_all_jobs()
+        self.store = get_job_store()
     
-    def get_top_skills(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """Get top skills by frequency"""
-        if self.jobs_df.empty:
+    @property
+    def jobs_df(self) -> pd.DataFrame:
+        """Shared, read-only jobs DataFrame from the process-wide JobStore"""
+        return self.store.jobs_df
+    
+    def get_top_skills(self, limit: int = 20, location: Optional[str] = None,
+                       since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get top skills by frequency, optionally in one location and from the
+        month `since` ("YYYY-MM") on. Filtered counts are grouped inside
+        jobs.db in sqlite mode and over the skill matrix in memory mode; an
+        unknown location has no skills.
+        """
+        data = self.store.data
+        aggregates = data.aggregates
+        if aggregates.rows == 0:
             return self._get_default_skills(limit)
         
-        all_skills = []
-        
-        # Extract skills from various columns
-        if 'skills' in self.jobs_df.columns:
-            for skills_str in self.jobs_df['skills'].dropna():
-                if isinstance(skills_str, str):
-                    skills = [s.strip() for s in skills_str.split(',')]
-                    all_skills.extend(skills)
-        
-        if 'description' in self.jobs_df.columns:
-            from utils.data_loader import extract_skills_from_description
-            for desc in self.jobs_df['description'].dropna():
-                skills = extract_skills_from_description(str(desc))
-                all_skills.extend(skills)
-        
-        # Count skills
-        skill_counts = Counter(all_skills)
-        total = sum(skill_counts.values())
+        if location is None and since is None:
+            # Precomputed mentions over the skills column and descriptions
+            counts = aggregates.skill_counts
+        else:
+            location_id = aggregates.location_id(location) if location is not None else None
+            if location is not None and location_id is None:
+                return []
+            counts = self._filtered_skill_counts(
+                data, aggregates.locations[location_id] if location_id is not None else None,
+                parse_month(since) if since is not None else None)
+        total = int(counts.sum())
+        skill_names = get_skill_taxonomy().names
         
         top_skills = []
-        for skill, count in skill_counts.most_common(limit):
+        for skill_id in SkillMatrix.top_k(counts, limit):
+            count = int(counts[skill_id])
             top_skills.append({
-                "skill": skill,
+                "skill": skill_names[skill_id],
                 "count": count,
                 "percentage": round((count / total * 100) if total > 0 else 0, 2)
             })
         
+        if location is not None or since is not None:
+            return top_skills
         return top_skills if top_skills else self._get_default_skills(limit)
     
-    def get_skills_by_location(self, limit_per_location: int = 10) -> List[Dict[str, Any]]:
+    def _filtered_skill_counts(self, data: JobData, location: Optional[str],
+                               start: Optional[pd.Timestamp]) -> np.ndarray:
+        """Mentions per skill ID in postings from `location` posted from `start` on"""
+        if self.store.sql_pushdown(data):
+            conn = get_db_connection()
+            if conn is None:
+                return np.zeros(0, dtype=np.int64)
+            try:
+                totals = job_db.query_skill_totals(
+                    conn, location=location, since=start.strftime('%Y-%m-%d') if start is not None else None,
+                    up_to_id=(data.watermark or {}).get("max_id"))
+            finally:
+                conn.close()
+            counts = np.zeros(int(totals.index.max()) + 1 if len(totals) else 0, dtype=np.int64)
+            counts[totals.index.to_numpy(dtype=np.int64)] = totals.to_numpy(dtype=np.int64)
+            return counts
+        
+        matrix = data.skill_matrix
+        if matrix is None:
+            raise ValueError("Filtering top skills needs posting-level data (M2M_INGEST_MODE=memory or sqlite)")
+        keep = np.ones(matrix.n_jobs, dtype=bool)
+        if location is not None:
+            keep &= matrix.location_codes == (matrix.locations.index(location) if location in matrix.locations else -2)
+        if start is not None:
+            recent = np.array([month >= start for month in matrix.months] + [False], dtype=bool)
+            # Unparseable dates have code -1, which indexes the trailing False
+            keep &= recent[matrix.month_codes]
+        return np.asarray(matrix.combined[np.flatnonzero(keep)].sum(axis=0)).ravel().astype(np.int64)
+    
+    def get_skills_by_location(self, limit_per_location: int = 10, locations: Optional[List[str]] = None,
+                               offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get skills grouped by location"""
-        if self.jobs_df.empty:
-            return []
+        return self.get_location_skill_page(limit_per_location, locations, offset, limit)["locations"]
+    
+    def get_location_skill_page(self, limit_per_location: int = 10, locations: Optional[List[str]] = None,
+                                offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get one page of locations with their top skills.
         
-        location_skills = []
+        Top skills for every selected location come from a single pass over
+        the location x skill count matrix rather than one scan per location.
+        `locations` filters by name (case-insensitive); `total` is the number
+        of matching locations before pagination.
+        """
+        aggregates = self.store.aggregates
+        if aggregates.rows == 0:
+            return {"total": 0, "locations": []}
         
-        if 'location' in self.jobs_df.columns:
-            locations = self.jobs_df['location'].dropna().unique()
-            
-            for location in locations:
-                location_df = self.jobs_df[self.jobs_df['location'] == location]
-                skills = []
-                
-                for skills_str in location_df['skills'].dropna() if 'skills' in location_df.columns else []:
-                    if isinstance(skills_str, str):
-                        skills.extend([s.strip() for s in skills_str.split(',')])
-                
-                skill_counts = Counter(skills)
-                top_skills = [
-                    {"skill": skill, "count": count, "percentage": round(count / len(skills) * 100 if skills else 0, 2)}
-                    for skill, count in skill_counts.most_common(limit_per_location)
-                ]
-                
-                location_skills.append({
-                    "location": str(location),
-                    "skills": top_skills
-                })
+        codes = np.arange(len(aggregates.locations))
+        if locations:
+            wanted = {name.strip().lower() for name in locations if name.strip()}
+            codes = codes[[name.lower() in wanted for name in aggregates.locations]]
+        total = len(codes)
+        codes = codes[offset:offset + limit if limit is not None else None]
         
-        return location_skills if location_skills else []
+        location_counts = aggregates.location_skill_counts[codes]
+        location_totals = np.asarray(location_counts.sum(axis=1)).ravel()
+        rows, skill_ids, counts = SkillMatrix.top_k_rows(location_counts, limit_per_location)
+        percentages = np.round(counts / np.maximum(location_totals[rows], 1) * 100, 2)
+        bounds = np.searchsorted(rows, np.arange(len(codes) + 1))
+        skill_names = aggregates.skill_names
+        
+        location_skills = []
+        for i, code in enumerate(codes):
+            top_skills = [
+                {"skill": skill_names[skill_id], "count": int(count), "percentage": float(percentage)}
+                for skill_id, count, percentage in zip(skill_ids[bounds[i]:bounds[i + 1]].tolist(),
+                                                       counts[bounds[i]:bounds[i + 1]].tolist(),
+                                                       percentages[bounds[i]:bounds[i + 1]].tolist())
+            ]
+            location_skills.append({
+                "location": aggregates.locations[code],
+                "skills": top_skills
+            })
+        
+        return {"total": total, "locations": location_skills}
     
     def get_role_skill_distribution(self, role: Optional[str] = None) -> Dict[str, Any]:
         """Get skill distribution by role"""
-        if self.jobs_df.empty:
+        aggregates = self.store.aggregates
+        if aggregates.rows == 0:
             return {"roles": [], "skills": {}}
         
-        df = self.jobs_df
-        if role and 'title' in df.columns:
-            df = df[df['title'].str.contains(role, case=False, na=False)]
+        title_codes = np.arange(len(aggregates.titles))
         
-        # Group by role/title and extract skills
-        role_skills = {}
+        # Filter on the distinct titles rather than on every row
+        if role:
+            matches = pd.Series(aggregates.titles, dtype=object).str.contains(role, case=False, regex=False)
+            title_codes = title_codes[matches.to_numpy(dtype=bool)]
+        
+        role_counts = aggregates.title_skill_counts
+        skill_names = aggregates.skill_names
         
-        if 'title' in df.columns:
-            for _, row in df.iterrows():
-                job_title = str(row.get('title', 'Unknown'))
-                skills = []
-                
-                if 'skills' in row and pd.notna(row['skills']):
-                    skills.extend([s.strip() for s in str(row['skills']).split(',')])
-                
-                if job_title not in role_skills:
-                    role_skills[job_title] = []
-                role_skills[job_title].extend(skills)
+        role_skills = {}
+        for code in title_codes:
+            row = role_counts.getrow(code)
+            role_skills[aggregates.titles[code]] = {
+                skill_names[skill_id]: int(count)
+                for skill_id, count in sorted(zip(row.indices, row.data))
+            }
         
         # Convert to format for frontend
         result = {
             "roles": list(role_skills.keys()),
-            "skills": {role: dict(Counter(skills)) for role, skills in role_skills.items()}
+            "skills": role_skills
         }
         
         return result
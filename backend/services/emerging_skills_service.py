@@ -4,172 +4,262 @@ Service for detecting emerging skills using NLP and clustering
 
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from typing import List, Dict, Any
-import re
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
-from collections import Counter
-from utils.data_loader import get_all_jobs
+import time
+from utils.job_store import JobData, get_job_store
+from utils.embedding_cache import get_embedding_cache
+from utils.engine_registry import register_engine, timed_import
+from utils.ingest import iter_frame_chunks, iter_job_chunks
+from utils.phrase_extractor import PhraseCounter, PhraseIndex
+from utils.phrase_clustering import CLUSTERING_METHOD, cluster_embeddings
+from utils.emergence import EMERGENCE_BASELINE, EMERGENCE_WINDOW, burst_scores
 
-# Lazy import of SentenceTransformer to handle import errors gracefully
-# Catches both ImportError and OSError (DLL loading issues on Windows)
-SentenceTransformer = None
-try:
-    from sentence_transformers import SentenceTransformer
-except (ImportError, OSError, Exception) as e:
-    print(f"Warning: sentence-transformers not available: {e}")
-    print("Emerging skills detection will use fallback method.")
-    print("This is normal if PyTorch cannot load on your system.")
+# Sentence-transformers model used to embed candidate phrases
+EMBEDDING_MODEL = os.environ.get("M2M_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# Most frequent phrases embedded and clustered per request
+MAX_CANDIDATE_PHRASES = int(os.environ.get("M2M_MAX_CANDIDATE_PHRASES", "2000"))
+
+def _load_embedding_model():
+    """Import sentence-transformers (and PyTorch) and load the embedding model"""
+    # Catches both ImportError and OSError (DLL loading issues on Windows)
+    try:
+        SentenceTransformer = timed_import("sentence_transformers").SentenceTransformer
+    except (ImportError, OSError, Exception) as e:
+        print(f"Warning: sentence-transformers not available: {e}")
+        print("Emerging skills detection will use fallback method.")
+        print("This is normal if PyTorch cannot load on your system.")
+        raise
+    # Using a smaller, CPU-friendly model
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+# Loaded on the first detection or by the startup warm-up, not when the API loads
+embedding_engine = register_engine("embeddings", _load_embedding_model)
 
 class EmergingSkillsService:
     """Service for detecting emerging skills from job descriptions"""
     
     def __init__(self):
-        self.jobs_df = get_all_jobs()
-        self.model = None
-        self._load_model()
+        self.store = get_job_store()
+        # Phrases embedded by earlier requests (or workers) are read back instead of re-encoded
+        self.embeddings = get_embedding_cache(EMBEDDING_MODEL)
+        self._phrase_counts: Optional[Tuple[int, PhraseCounter]] = None
+        self._phrase_index: Optional[Tuple[int, PhraseIndex]] = None
     
-    def _load_model(self):
-        """Load sentence transformer model"""
-        if SentenceTransformer is None:
-            print("Warning: SentenceTransformer not available. Using fallback detection method.")
-            return
-        
-        try:
-            # Using a smaller, CPU-friendly model
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        except Exception as e:
-            print(f"Error loading model: {e}")
-            print("Emerging skills detection will use fallback method.")
-            self.model = None
+    @property
+    def jobs_df(self) -> pd.DataFrame:
+        """Shared, read-only jobs DataFrame from the process-wide JobStore"""
+        return self.store.jobs_df
     
-    def detect_emerging_skills(self, min_cluster_size: int = 3) -> List[Dict[str, Any]]:
+    @property
+    def model(self):
+        """Sentence transformer model, loaded on first use unless the warm-up already did; None if unavailable"""
+        return embedding_engine.get()
+    
+    def detect_emerging_skills(self, min_cluster_size: int = 3, method: Optional[str] = None,
+                               n_clusters: Optional[int] = None, window: Optional[int] = None,
+                               baseline: Optional[int] = None) -> List[Dict[str, Any]]:
         """Detect emerging skills using phrase extraction and clustering"""
-        if self.jobs_df.empty or self.model is None:
-            return self._get_default_emerging_skills()
+        return self.detect(min_cluster_size, method=method, n_clusters=n_clusters,
+                           window=window, baseline=baseline)["emerging_skills"]
+    
+    def detect(self, min_cluster_size: int = 3, method: Optional[str] = None, n_clusters: Optional[int] = None,
+               window: Optional[int] = None, baseline: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Detect emerging skills and describe how they were found
+        
+        Returns {"emerging_skills", "metadata"}; metadata names the clustering
+        method, the number of phrases and clusters, the periods compared and
+        seconds spent per stage. Skills are ranked by how much their mentions in
+        the last `window` months burst above the `baseline` months before them.
+        """
+        method = method or CLUSTERING_METHOD
+        window = window or EMERGENCE_WINDOW
+        baseline = baseline or EMERGENCE_BASELINE
+        timings: Dict[str, float] = {}
+        metadata: Dict[str, Any] = {"method": method, "phrases": 0, "clusters": 0, "noise": 0,
+                                    "fallback": True, "timings": timings}
+        start = last = time.perf_counter()
+        
+        def lap(name: str):
+            """Record seconds since the previous stage ended"""
+            nonlocal last
+            now = time.perf_counter()
+            timings[name] = round(now - last, 4)
+            last = now
+        
+        if self.store.aggregates.rows == 0 or self.model is None:
+            return {"emerging_skills": self._get_default_emerging_skills(), "metadata": metadata}
         
         # Extract phrases from job descriptions
         phrases = self._extract_phrases_from_descriptions()
+        lap("extract")
         
         if not phrases:
-            return self._get_default_emerging_skills()
+            return {"emerging_skills": self._get_default_emerging_skills(), "metadata": metadata}
         
-        # Get embeddings
-        embeddings = self.model.encode(phrases, show_progress_bar=False)
+        # Get embeddings, encoding only phrases not seen before
+        embeddings = self.embeddings.encode(
+            phrases,
+            lambda batch: self.model.encode(batch, batch_size=len(batch), show_progress_bar=False)
+        )
+        lap("embed")
         
         # Cluster phrases
-        clusters = self._cluster_phrases(embeddings, phrases, min_cluster_size)
+        clusters, noise = self._cluster_phrases(embeddings, phrases, min_cluster_size, method, n_clusters)
+        lap("cluster")
         
-        # Score emerging skills
-        emerging_skills = self._score_emerging_skills(clusters)
+        # Score emerging skills against the postings that mention each phrase
+        index = self._index_phrases(phrases)
+        lap("index")
+        emerging_skills, timeline = self._score_emerging_skills(clusters, index, window, baseline)
         
         # Save results
         self._save_emerging_skills(emerging_skills)
+        lap("score")
+        timings["total"] = round(time.perf_counter() - start, 4)
         
-        return emerging_skills
+        metadata.update({"phrases": len(phrases), "clusters": len(clusters), "noise": noise,
+                         "fallback": False, "timeline": timeline})
+        return {"emerging_skills": emerging_skills, "metadata": metadata}
     
     def _extract_phrases_from_descriptions(self) -> List[str]:
-        """Extract meaningful phrases from job descriptions"""
-        phrases = []
-        
-        if 'description' not in self.jobs_df.columns:
-            return []
-        
-        # Common tech phrase patterns
-        patterns = [
-            r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:framework|library|tool|platform|service|technology)\b',
-            r'\b(?:microservices|serverless|cloud-native|edge computing|quantum computing|blockchain)\b',
-            r'\b[A-Z]{2,}\b',  # Acronyms like AWS, API, CI/CD
-            r'\b(?:AI|ML|DL|NLP|CV|IoT|AR|VR|RPA|DevOps|MLOps|DataOps)\b'
-        ]
+        """Candidate phrases from job descriptions, most frequent across the whole corpus first"""
+        return [phrase for phrase, _ in self._count_phrases().top(MAX_CANDIDATE_PHRASES)]
+    
+    def _index_phrases(self, phrases: List[str]) -> PhraseIndex:
+        """Inverted index of the candidate phrases over all postings, built once per data version"""
+        data = self.store.data
+        cached = self._phrase_index
+        if cached is not None and cached[0] == data.version and cached[1].phrases == phrases:
+            return cached[1]
+        index = PhraseIndex.build(self._description_chunks(data), phrases)
+        self._phrase_index = (data.version, index)
+        return index
+    
+    def _count_phrases(self) -> PhraseCounter:
+        """Bigram and trigram document frequencies over all descriptions, counted once per data version"""
+        data = self.store.data
+        # Streaming ingestion already counts them chunk by chunk
+        if data.aggregates.phrases is not None:
+            return data.aggregates.phrases
         
-        for desc in self.jobs_df['description'].dropna():
-            desc_str = str(desc).lower()
-            
-            # Extract 2-3 word technical phrases
-            words = re.findall(r'\b[a-z]{3,}\b', desc_str)
-            for i in range(len(words) - 1):
-                phrase = f"{words[i]} {words[i+1]}"
-                if len(phrase.split()) == 2 and phrase not in phrases:
-                    phrases.append(phrase)
-        
-        return phrases[:500]  # Limit for performance
+        cached = self._phrase_counts
+        if cached is not None and cached[0] == data.version:
+            return cached[1]
+        counter = PhraseCounter()
+        for chunk in self._description_chunks(data):
+            counter.update(chunk['description'])
+        self._phrase_counts = (data.version, counter)
+        return counter
     
-    def _cluster_phrases(self, embeddings: np.ndarray, phrases: List[str], min_size: int) -> Dict[int, List[str]]:
-        """Cluster phrases using KMeans"""
+    @staticmethod
+    def _description_chunks(data: JobData) -> Iterator[pd.DataFrame]:
+        """Descriptions (and posted dates) in bounded chunks, from memory or streamed from the source"""
+        columns = [c for c in ('description', 'posted_date') if c in data.jobs_df.columns]
+        if 'description' in columns:
+            yield from iter_frame_chunks(data.jobs_df[columns])
+        elif data.source in ("csv", "db"):
+            watermark = data.watermark or {}
+            for chunk in iter_job_chunks(source=data.source, max_id=watermark.get("max_id"),
+                                         max_bytes=watermark.get("size")):
+                if 'description' in chunk.columns:
+                    yield chunk
+    
+    def _cluster_phrases(self, embeddings: np.ndarray, phrases: List[str], min_size: int, method: str,
+                         n_clusters: Optional[int] = None) -> Tuple[Dict[int, List[str]], int]:
+        """Group phrases by cluster, returning clusters of at least `min_size` and the count of noise phrases"""
         if len(phrases) < min_size:
-            return {}
-        
-        n_clusters = min(10, len(phrases) // min_size)
-        n_clusters = max(2, n_clusters)
+            return {}, len(phrases)
         
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(embeddings)
+        labels = cluster_embeddings(embeddings, method=method, min_cluster_size=min_size, n_clusters=n_clusters)
         
         clusters = {}
-        for i, label in enumerate(labels):
-            if label not in clusters:
-                clusters[label] = []
-            clusters[label].append(phrases[i])
+        for phrase, label in zip(phrases, labels.tolist()):
+            if label >= 0:
+                clusters.setdefault(label, []).append(phrase)
         
         # Filter small clusters
         filtered_clusters = {k: v for k, v in clusters.items() if len(v) >= min_size}
+        noise = len(phrases) - sum(len(v) for v in filtered_clusters.values())
         
-        return filtered_clusters
+        return filtered_clusters, noise
     
-    def _score_emerging_skills(self, clusters: Dict[int, List[str]]) -> List[Dict[str, Any]]:
-        """Score and rank emerging skill candidates"""
-        emerging_skills = []
+    def _score_emerging_skills(self, clusters: Dict[int, List[str]], index: PhraseIndex, window: int,
+                               baseline: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Score and rank emerging skill candidates by how their mentions burst
         
-        # Get recent job postings (if date column exists)
-        recent_df = self.jobs_df
-        if 'posted_date' in self.jobs_df.columns:
-            try:
-                # Assume last 3 months are "recent"
-                recent_df = self.jobs_df.tail(len(self.jobs_df) // 2)
-            except:
-                pass
-        
-        for cluster_id, phrases in clusters.items():
-            # Count phrase frequency
-            phrase_counts = Counter(phrases)
-            top_phrase = phrase_counts.most_common(1)[0][0]
-            
-            # Calculate confidence based on:
-            # - Cluster size
-            # - Frequency in recent jobs
-            # - Uniqueness (less common = more emerging)
-            
-            cluster_size = len(phrases)
-            total_phrases = sum(len(p) for p in clusters.values())
-            
-            # Frequency in recent jobs
-            recent_mentions = sum(1 for desc in recent_df['description'].dropna() 
-                                 if top_phrase.lower() in str(desc).lower()) if 'description' in recent_df.columns else 0
-            
-            # Confidence score (0-1)
-            confidence = min(1.0, (cluster_size / max(total_phrases, 1)) * 2 + (recent_mentions / max(len(recent_df), 1)) * 3)
-            confidence = round(confidence, 2)
+        Each cluster's monthly mentions (summed over its phrases) are compared
+        between the last `window` months and the `baseline` months before them.
+        With fewer months than that, both are shortened to the months there
+        are, keeping at least one baseline month. Only postings without any
+        posted dates are split into window + baseline equal runs in stream
+        order instead. Returns the skills and a description of the periods
+        compared.
+        """
+        months, phrase_counts, totals = index.monthly_counts()
+        if months:
+            window = max(1, min(window, len(months) - 1))
+            baseline = max(0, min(baseline, len(months) - window))
+            timeline = {"periods": "month", "recent_from": months[-window].strftime("%Y-%m"),
+                        "baseline_from": months[len(months) - window - baseline].strftime("%Y-%m")}
+        else:
+            phrase_counts, totals = index.bucket_counts(window + baseline)
+            timeline = {"periods": "posting_order"}
+        n_periods = phrase_counts.shape[1]
+        window = min(window, n_periods)
+        baseline = max(0, min(baseline, n_periods - window))
+        timeline.update({"window": window, "baseline": baseline})
+        if not clusters or n_periods == 0:
+            return [], timeline
+        
+        # (clusters x periods) mentions, one row per cluster, built in one scatter-add
+        cluster_ids = list(clusters)
+        member_rows = np.concatenate([index.ids(clusters[c]) for c in cluster_ids])
+        member_cluster = np.repeat(np.arange(len(cluster_ids)), [len(clusters[c]) for c in cluster_ids])
+        indexed = member_rows >= 0
+        cluster_counts = np.zeros((len(cluster_ids), n_periods), dtype=np.int64)
+        np.add.at(cluster_counts, member_cluster[indexed], phrase_counts[member_rows[indexed]])
+        scores = burst_scores(cluster_counts, totals, window=window, baseline=baseline)
+        
+        # Confidence saturates with the burst z-score: 0.63 at 3 standard deviations, 0.86 at 6
+        confidence = np.round(1 - np.exp(-np.maximum(scores["burst"], 0) / 3), 2)
+        mentions = phrase_counts.sum(axis=1)
+        
+        emerging_skills = []
+        for i, cluster_id in enumerate(cluster_ids):
+            phrases = clusters[cluster_id]
+            # Each cluster is represented by its most mentioned phrase
+            rows = index.ids(phrases)
+            top_phrase = phrases[int(np.argmax(np.where(rows >= 0, mentions[np.maximum(rows, 0)], -1)))]
+            growth, burst, acceleration = (float(scores[k][i]) for k in ("growth", "burst", "acceleration"))
             
             # Determine trend
-            if confidence > 0.7:
+            if burst >= 3 and growth >= 2:
                 trend = "High Growth"
-            elif confidence > 0.4:
+            elif burst >= 1 or (acceleration > 0 and growth > 1):
                 trend = "Growing"
             else:
                 trend = "Emerging"
             
             emerging_skills.append({
                 "skill": top_phrase.title(),
-                "confidence_score": confidence,
-                "frequency": cluster_size,
-                "trend": trend
+                "confidence_score": float(confidence[i]),
+                "frequency": len(phrases),
+                "trend": trend,
+                "recent_mentions": int(scores["recent"][i]),
+                "baseline_mentions": int(scores["base"][i]),
+                "growth": round(growth, 3),
+                "burst_score": round(burst, 3),
+                "acceleration": round(acceleration, 3)
             })
         
-        # Sort by confidence
-        emerging_skills.sort(key=lambda x: x['confidence_score'], reverse=True)
+        # Sort by confidence, then growth
+        emerging_skills.sort(key=lambda x: (x['confidence_score'], x['growth']), reverse=True)
         
-        return emerging_skills[:20]  # Top 20
+        return emerging_skills[:20], timeline  # Top 20
     
     def _save_emerging_skills(self, skills: List[Dict[str, Any]]):
         """Save emerging skills to CSV files"""
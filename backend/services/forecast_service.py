@@ -1,138 +1,502 @@
 """
-Forecast service for skill demand prediction using Prophet
+Forecast service for skill demand prediction using Prophet or a fast
+damped-trend smoothing engine
 """
 
+import os
+import time
+import threading
+import multiprocessing
+import numpy as np
 import pandas as pd
-from prophet import Prophet
-from typing import Dict, Any, List
-from datetime import datetime, timedelta
-from utils.data_loader import get_all_jobs
-from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
+from datetime import datetime
+from utils import job_db
+from utils.data_loader import get_db_connection
+from utils.ingest import parse_month
+from utils.job_store import JobData, get_job_store
+from utils.skill_taxonomy import get_skill_taxonomy
+from utils.forecast_cache import get_forecast_cache
+from utils.fast_forecast import DampedTrendForecaster
+from utils.engine_registry import register_engine, timed_import
+
+# Fits are cached with predictions over the longest horizon the API accepts,
+# so any `months` value is served by slicing one cached frame
+MAX_HORIZON_MONTHS = 24
+
+PROPHET_CONFIG = {"yearly_seasonality": True, "weekly_seasonality": True}
+
+# "prophet" or "fast" (vectorized damped-trend smoothing); requests may override it
+FORECAST_ENGINE = os.environ.get("M2M_FORECAST_ENGINE", "prophet")
+FORECAST_ENGINES = ("prophet", "fast")
+
+# Predictions are daily; coarser resolutions average them per calendar week or month
+FORECAST_RESOLUTIONS = ("day", "week", "month")
+
+# "rows": one {date, predicted, lower_bound, upper_bound} object per point;
+# "columns": parallel arrays, much smaller to validate and serialize
+FORECAST_LAYOUTS = ("rows", "columns")
+
+# Series the fast engine predicts at a time; bounds its (series x days) arrays
+FAST_PREDICT_BLOCK = int(os.environ.get("M2M_FAST_PREDICT_BLOCK", "2048"))
+
+# Worker processes for batch forecasts (defaults to one per core)
+FORECAST_WORKERS = int(os.environ.get("M2M_FORECAST_WORKERS", "0")) or os.cpu_count() or 1
+
+def _load_prophet():
+    """Import Prophet (and matplotlib, scipy and its Stan backend) and build one model to load the backend"""
+    Prophet = timed_import("prophet").Prophet
+    Prophet(**PROPHET_CONFIG)
+    return Prophet
+
+# Imported on first fit or by the startup warm-up, not when the API loads
+prophet_engine = register_engine("prophet", _load_prophet)
+
+def fit_prophet(df_prophet: pd.DataFrame) -> pd.DataFrame:
+    """Fit Prophet on a (ds, y) history and predict MAX_HORIZON_MONTHS past it"""
+    Prophet = prophet_engine.require()
+    model = Prophet(**PROPHET_CONFIG)
+    model.fit(df_prophet)
+    future = model.make_future_dataframe(periods=MAX_HORIZON_MONTHS * 30)
+    return model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+class UnknownLocationError(LookupError):
+    """Raised when a forecast is requested for a location with no postings in the data"""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_forecast_pool() -> ProcessPoolExecutor:
+    """Get the process pool batch fits run on, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn, not fork: the API process runs threads (watcher, executors)
+                _pool = ProcessPoolExecutor(max_workers=FORECAST_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+def shutdown_forecast_pool():
+    """Stop the batch forecast workers, if they were started"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
 
 class ForecastService:
     """Service for forecasting skill demand"""
     
     def __init__(self):
-        self.jobs_df = get_all_jobs()
+        self.store = get_job_store()
+        self.taxonomy = get_skill_taxonomy()
+        self.cache = get_forecast_cache()
     
-    def forecast_skill_demand(self, skill: str, months: int = 6) -> Dict[str, Any]:
-        """Forecast future demand for a skill"""
-        # Prepare time series data
-        skill_demand_history = self._prepare_skill_history(skill)
-        
-        if not skill_demand_history:
-            return self._generate_default_forecast(skill, months)
+    @property
+    def jobs_df(self) -> pd.DataFrame:
+        """Shared, read-only jobs DataFrame from the process-wide JobStore"""
+        return self.store.jobs_df
+    
+    def forecast_skill_demand(self, skill: str, months: int = 6, engine: Optional[str] = None,
+                              resolution: str = "day", layout: str = "rows",
+                              location: Optional[str] = None) -> Dict[str, Any]:
+        """Forecast future demand for a skill, overall or in one location"""
+        self.resolve_location(location)
+        if self._engine(engine) == "fast":
+            return self.forecast_fast([skill], months, resolution, layout, location)[0]
         
-        # Create Prophet model
-        df_prophet = pd.DataFrame({
-            'ds': [date for date, _ in skill_demand_history],
-            'y': [count for _, count in skill_demand_history]
-        })
+        df_prophet = self._history_frame(skill, location)
+        if df_prophet is None:
+            return self._generate_default_forecast(skill, months, resolution, layout)
         
         try:
-            model = Prophet(yearly_seasonality=True, weekly_seasonality=True)
-            model.fit(df_prophet)
-            
-            # Make future predictions
-            future = model.make_future_dataframe(periods=months * 30)  # months * 30 days
-            forecast = model.predict(future)
+            key = self._cache_key(skill, df_prophet, location)
+            forecast = self.cache.get(key)
+            if forecast is None:
+                forecast = fit_prophet(df_prophet)
+                self.cache.put(key, forecast)
+            return self._build_forecast(skill, df_prophet, forecast, months, resolution, layout, location)
+        except Exception as e:
+            print(f"Forecast error: {e}")
+            return self._generate_default_forecast(skill, months, resolution, layout)
+    
+    def prefit(self, skill: str, engine: Optional[str] = None) -> bool:
+        """
+        Fit and cache a skill's forecast ahead of requests with `engine` (M2M_FORECAST_ENGINE
+        by default); False if cached, without history, or for the fast engine, which is not cached
+        """
+        if self._engine(engine) == "fast":
+            return False
+        df_prophet = self._history_frame(skill)
+        if df_prophet is None:
+            return False
+        key = self._cache_key(skill, df_prophet)
+        if self.cache.contains(key):
+            return False
+        self.cache.put(key, fit_prophet(df_prophet))
+        return True
+    
+    def forecast_batch(self, skills: List[str], months: int = 6, engine: Optional[str] = None,
+                       resolution: str = "day", layout: str = "rows",
+                       location: Optional[str] = None) -> List[Future]:
+        """
+        Forecast several skills, fitting cache misses in parallel on the process pool.
+        
+        Returns one future per skill, each resolving to {"skill", "cached",
+        "seconds", "forecast"}, so callers can consume results as they
+        complete. Aliases of one skill share a single fit. The fast engine
+        fits the whole batch in one vectorized pass instead.
+        """
+        self.resolve_location(location)
+        if self._engine(engine) == "fast":
+            start = time.perf_counter()
+            results = []
+            for skill, forecast in zip(skills, self.forecast_fast(skills, months, resolution, layout, location)):
+                result: Future = Future()
+                result.set_result(self._batch_item(skill, start, False, forecast))
+                results.append(result)
+            return results
+        
+        pool = get_forecast_pool()
+        fits: Dict[str, Future] = {}
+        results: List[Future] = []
+        
+        for skill in skills:
+            start = time.perf_counter()
+            result: Future = Future()
+            results.append(result)
             
-            # Extract forecast data
-            forecast_data = []
-            for _, row in forecast.tail(months * 30).iterrows():
-                forecast_data.append({
-                    "date": row['ds'].strftime('%Y-%m-%d'),
-                    "predicted": round(row['yhat'], 2),
-                    "lower_bound": round(row['yhat_lower'], 2),
-                    "upper_bound": round(row['yhat_upper'], 2)
-                })
+            df_prophet = self._history_frame(skill, location)
+            if df_prophet is None:
+                result.set_result(self._batch_item(skill, start, True,
+                                                   self._generate_default_forecast(skill, months, resolution, layout)))
+                continue
             
-            # Calculate trend
-            current_demand = df_prophet['y'].iloc[-1] if len(df_prophet) > 0 else 0
-            predicted_demand = forecast['yhat'].iloc[-1] if len(forecast) > 0 else current_demand
-            change_pct = ((predicted_demand - current_demand) / current_demand * 100) if current_demand > 0 else 0
+            key = self._cache_key(skill, df_prophet, location)
+            forecast = self.cache.get(key)
+            if forecast is not None:
+                result.set_result(self._batch_item(skill, start, True,
+                                                   self._build_forecast(skill, df_prophet, forecast, months,
+                                                                        resolution, layout, location)))
+                continue
             
-            trend = self._interpret_trend(change_pct, skill)
+            if key not in fits:
+                fits[key] = pool.submit(fit_prophet, df_prophet)
+            fits[key].add_done_callback(
+                lambda fit, skill=skill, df_prophet=df_prophet, key=key, start=start, result=result:
+                    self._finish_batch_item(fit, skill, df_prophet, key, start, months, resolution, layout,
+                                            location, result)
+            )
+        
+        return results
+    
+    def forecast_fast(self, skills: List[str], months: int = 6, resolution: str = "day",
+                      layout: str = "rows", location: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Forecast any number of skills with the vectorized damped-trend engine.
+        
+        Each skill's series (overall, or in `location`) runs over the
+        dataset's months from its first posting; all series are fitted
+        together in one pass.
+        """
+        aggregates = self.store.aggregates
+        skill_ids = [self.taxonomy.lookup(skill) for skill in skills]
+        skill_ids = [i if i is not None else -1 for i in skill_ids]
+        if location is None:
+            month_axis, history = aggregates.skill_history(skill_ids)
+        else:
+            month_axis, history = aggregates.location_skill_history(
+                [self.resolve_location(location)] * len(skill_ids), skill_ids)
+        
+        results = self._fit_fast(skills, month_axis, history, months, resolution, layout,
+                                 [location] * len(skills) if location is not None else None)
+        return [result if result is not None else self._generate_default_forecast(skill, months, resolution, layout)
+                for skill, result in zip(skills, results)]
+    
+    def forecast_locations(self, skill: Optional[str] = None, months: int = 6, resolution: str = "month",
+                           layout: str = "columns", locations: Optional[List[str]] = None,
+                           limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Forecast a skill in every location it is posted in, or without a
+        skill every (skill, location) series in the data, in one vectorized
+        fit over the skill x location x month cube.
+        
+        Series are ordered by their total postings, busiest first, and cut
+        to `limit`; `total` counts them before the cut.
+        """
+        aggregates = self.store.aggregates
+        skill_id = None
+        if skill is not None:
+            skill_id = self.taxonomy.lookup(skill)
+            if skill_id is None:
+                return {"skill": skill, "total": 0, "forecasts": []}
+        
+        location_ids, skill_ids = aggregates.location_series(skill_id=skill_id)
+        if locations:
+            wanted = {name.strip().lower() for name in locations if name.strip()}
+            keep = np.array([aggregates.locations[i].lower() in wanted for i in location_ids], dtype=bool)
+            location_ids, skill_ids = location_ids[keep], skill_ids[keep]
+        
+        month_axis, history = aggregates.location_skill_history(location_ids.tolist(), skill_ids.tolist())
+        # Busiest series first
+        order = np.argsort(-history.sum(axis=1), kind='stable')[:limit]
+        names = [skill if skill is not None else self.taxonomy.names[i] for i in skill_ids[order]]
+        results = self._fit_fast(names, month_axis, history[order], months, resolution, layout,
+                                 [aggregates.locations[i] for i in location_ids[order]])
+        return {"skill": skill, "total": len(location_ids), "forecasts": results}
+    
+    def _fit_fast(self, skills: List[str], month_axis: List[pd.Timestamp], history: np.ndarray, months: int,
+                  resolution: str, layout: str,
+                  locations: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Fit the damped-trend engine to every row of `history` at once; None for rows without postings"""
+        has_history = history.sum(axis=1) > 0
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(skills)
+        if not has_history.any():
+            return results
+        
+        series = history[has_history]
+        model = DampedTrendForecaster().fit(series)
+        steps = np.arange(1, months * 30 + 1)
+        days = month_axis[-1] + pd.to_timedelta(steps, unit='D')
+        indices = np.flatnonzero(has_history)
+        
+        # Daily predictions are (series x days); build them a block at a time to bound memory
+        for block in range(0, len(series), FAST_PREDICT_BLOCK):
+            block_model = model.subset(slice(block, block + FAST_PREDICT_BLOCK))
+            values = np.stack(block_model.predict(steps / 30))
+            points = self._forecast_points(days, values, resolution, layout)
             
-            return {
-                "skill": skill,
-                "forecast_data": forecast_data,
-                "trend": trend,
-                "current_demand": round(current_demand, 2),
-                "predicted_demand": round(predicted_demand, 2),
-                "change_percentage": round(change_pct, 2)
-            }
+            for row, i in enumerate(indices[block:block + FAST_PREDICT_BLOCK]):
+                current_demand = float(series[block + row, -1])
+                predicted_demand = round(float(values[0, row, -1]), 2)
+                change_pct = ((predicted_demand - current_demand) / current_demand * 100) if current_demand > 0 else 0
+                results[i] = {
+                    "skill": skills[i],
+                    "forecast_data": points[row],
+                    "trend": self._interpret_trend(change_pct, skills[i]),
+                    "current_demand": round(current_demand, 2),
+                    "predicted_demand": round(predicted_demand, 2),
+                    "change_percentage": round(float(change_pct), 2)
+                }
+                if locations is not None:
+                    results[i]["location"] = locations[i]
+        
+        return results
+    
+    def resolve_location(self, location: Optional[str]) -> Optional[int]:
+        """Code of a requested location (None for no location); UnknownLocationError if it has no postings"""
+        if location is None:
+            return None
+        location_id = self.store.aggregates.location_id(location)
+        if location_id is None:
+            raise UnknownLocationError(f"Location '{location}' not found")
+        return location_id
+    
+    @staticmethod
+    def _engine(engine: Optional[str]) -> str:
+        engine = (engine or FORECAST_ENGINE).lower()
+        if engine not in FORECAST_ENGINES:
+            raise ValueError(f"Unknown forecast engine '{engine}', expected one of {', '.join(FORECAST_ENGINES)}")
+        return engine
+    
+    def _finish_batch_item(self, fit: Future, skill: str, df_prophet: pd.DataFrame, key: str,
+                           start: float, months: int, resolution: str, layout: str,
+                           location: Optional[str], result: Future):
+        """Turn a finished pool fit into a batch result (runs on the pool's callback thread)"""
+        try:
+            forecast = fit.result()
+            self.cache.put(key, forecast)
+            result.set_result(self._batch_item(skill, start, False,
+                                               self._build_forecast(skill, df_prophet, forecast, months,
+                                                                    resolution, layout, location)))
         except Exception as e:
             print(f"Forecast error: {e}")
-            return self._generate_default_forecast(skill, months)
+            result.set_result(self._batch_item(skill, start, False,
+                                               self._generate_default_forecast(skill, months, resolution, layout)))
     
-    def _prepare_skill_history(self, skill: str) -> List[tuple]:
-        """Prepare historical skill demand data"""
-        if self.jobs_df.empty:
-            return []
+    @staticmethod
+    def _batch_item(skill: str, start: float, cached: bool, forecast: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "skill": skill,
+            "cached": cached,
+            "seconds": round(time.perf_counter() - start, 4),
+            "forecast": forecast
+        }
+    
+    def _history_frame(self, skill: str, location: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """The (ds, y) series a model is fitted on, or None without history"""
+        skill_demand_history = self._prepare_skill_history(skill, location)
+        if not skill_demand_history:
+            return None
+        return pd.DataFrame({
+            'ds': [date for date, _ in skill_demand_history],
+            'y': [count for _, count in skill_demand_history]
+        })
+    
+    def _cache_key(self, skill: str, df_prophet: pd.DataFrame, location: Optional[str] = None) -> str:
+        config = dict(PROPHET_CONFIG, horizon_days=MAX_HORIZON_MONTHS * 30)
+        if location is not None:
+            config["location"] = location.strip().lower()
+        return self.cache.make_key(self.taxonomy.canonical(skill), df_prophet, config)
+    
+    def _build_forecast(self, skill: str, df_prophet: pd.DataFrame, forecast: pd.DataFrame,
+                        months: int, resolution: str = "day", layout: str = "rows",
+                        location: Optional[str] = None) -> Dict[str, Any]:
+        """Response for a `months` horizon from a fitted forecast frame"""
+        # Future rows only, months * 30 days past the history
+        forecast = forecast.iloc[len(df_prophet):len(df_prophet) + months * 30]
         
-        skill_history = defaultdict(int)
+        # Extract forecast data: (predicted, lower, upper) x one series x days
+        values = forecast[['yhat', 'yhat_lower', 'yhat_upper']].to_numpy(dtype=float).T[:, None, :]
+        forecast_data = self._forecast_points(pd.DatetimeIndex(forecast['ds']), values, resolution, layout)[0]
         
-        # Normalize skill name for better matching
-        skill_lower = skill.lower().strip()
-        skill_variants = [
-            skill_lower,
-            skill_lower.replace(' ', ''),  # Remove spaces
-            skill_lower.replace('.', ''),  # Remove dots
-            skill_lower.replace('/', ''),  # Remove slashes
-        ]
+        # Calculate trend
+        current_demand = df_prophet['y'].iloc[-1] if len(df_prophet) > 0 else 0
+        predicted_demand = forecast['yhat'].iloc[-1] if len(forecast) > 0 else current_demand
+        change_pct = ((predicted_demand - current_demand) / current_demand * 100) if current_demand > 0 else 0
         
-        # Add common abbreviations/variants
-        if skill_lower == 'javascript':
-            skill_variants.extend(['js', 'java script'])
-        elif skill_lower == 'typescript':
-            skill_variants.extend(['ts'])
-        elif skill_lower == 'python':
-            skill_variants.extend(['py'])
-        elif skill_lower == 'amazon web services':
-            skill_variants.extend(['aws'])
-        elif skill_lower == 'machine learning':
-            skill_variants.extend(['ml'])
-        elif skill_lower == 'artificial intelligence':
-            skill_variants.extend(['ai'])
-        
-        # Extract skills from job postings by date
-        if 'posted_date' in self.jobs_df.columns and 'description' in self.jobs_df.columns:
-            for _, row in self.jobs_df.iterrows():
-                date_str = str(row.get('posted_date', ''))
-                description = str(row.get('description', '')).lower()
-                skills_field = str(row.get('skills', '')).lower()
-                
-                # Check if any skill variant matches
-                skill_found = False
-                for variant in skill_variants:
-                    if variant in description or variant in skills_field:
-                        skill_found = True
-                        break
-                
-                if skill_found:
-                    try:
-                        # Parse date (assuming format YYYY-MM-DD or similar)
-                        if date_str and len(date_str) >= 7:
-                            date_key = date_str[:7]  # Group by month (YYYY-MM)
-                            skill_history[date_key] += 1
-                    except:
-                        pass
-        
-        # Sort by date
-        sorted_history = sorted(skill_history.items())
-        
-        # Convert to datetime objects for Prophet
-        result = []
-        for date_str, count in sorted_history:
-            try:
-                date_obj = datetime.strptime(date_str + '-01', '%Y-%m-%d')
-                result.append((date_obj, count))
-            except:
-                pass
+        trend = self._interpret_trend(change_pct, skill)
         
+        result = {
+            "skill": skill,
+            "forecast_data": forecast_data,
+            "trend": trend,
+            "current_demand": round(float(current_demand), 2),
+            "predicted_demand": round(float(predicted_demand), 2),
+            "change_percentage": round(float(change_pct), 2)
+        }
+        if location is not None:
+            result["location"] = location
         return result
     
+    @staticmethod
+    def _resample(days: pd.DatetimeIndex, values: np.ndarray, resolution: str) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        """
+        Average daily predictions (last axis of `values`) per calendar week or
+        month. Each period is labelled by its first forecast day, so a partial
+        first period is not dated before the forecast starts.
+        """
+        if resolution not in FORECAST_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(FORECAST_RESOLUTIONS)}")
+        if resolution == "day" or len(days) == 0:
+            return days, values
+        periods = days.to_period("W" if resolution == "week" else "M").asi8
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        sizes = np.diff(np.r_[starts, len(periods)])
+        return days[starts], np.add.reduceat(values, starts, axis=-1) / sizes
+    
+    def _forecast_points(self, days: pd.DatetimeIndex, values: np.ndarray, resolution: str,
+                         layout: str) -> List[Union[List[Dict[str, Any]], Dict[str, List]]]:
+        """`forecast_data` for each series in `values`, shaped (predicted/lower/upper, series, day)"""
+        if layout not in FORECAST_LAYOUTS:
+            raise ValueError(f"Unknown layout '{layout}', expected one of {', '.join(FORECAST_LAYOUTS)}")
+        dates, values = self._resample(days, values, resolution)
+        labels = dates.strftime('%Y-%m-%d').tolist()
+        predicted, lower, upper = np.round(values, 2).tolist()
+        
+        if layout == "columns":
+            return [{"dates": labels, "predicted": p, "lower_bound": lo, "upper_bound": up}
+                    for p, lo, up in zip(predicted, lower, upper)]
+        return [
+            [{"date": date, "predicted": p, "lower_bound": lo, "upper_bound": up}
+             for date, p, lo, up in zip(labels, series_p, series_lo, series_up)]
+            for series_p, series_lo, series_up in zip(predicted, lower, upper)
+        ]
+    
+    def _prepare_skill_history(self, skill: str, location: Optional[str] = None) -> List[tuple]:
+        """Prepare historical skill demand data, overall or in one location"""
+        aggregates = self.store.aggregates
+        if aggregates.rows == 0:
+            return []
+        
+        # Resolve aliases ("js", "Node", "node.js") to one canonical skill ID
+        skill_id = self.taxonomy.lookup(skill)
+        if skill_id is None or skill_id >= aggregates.n_skills:
+            return []
+        
+        # Postings per month mentioning the skill in the skills column or the description
+        if location is not None:
+            location_id = aggregates.location_id(location)
+            if location_id is None:
+                return []
+            months, history = aggregates.location_skill_history([location_id], [skill_id])
+        else:
+            months, history = aggregates.skill_history([skill_id])
+        
+        # From the first posting through the last month of data, months without postings as zeros,
+        # so sparse series are fitted on the same axis as the fast engine and forecast from the same month
+        posted = np.flatnonzero(history[0] > 0)
+        if len(posted) == 0:
+            return []
+        return [(month.to_pydatetime(), int(count))
+                for month, count in zip(months[posted[0]:], history[0][posted[0]:])]
+    
+    def compare_skill_histories(self, skills: List[str], location: Optional[str] = None,
+                                since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Monthly posting counts for several skills over one shared, chronological month axis,
+        optionally in one location (UnknownLocationError if it has no postings) and from
+        the month `since` ("YYYY-MM") on. In sqlite mode the filtered counts are grouped
+        inside jobs.db.
+        """
+        data = self.store.data
+        aggregates = data.aggregates
+        location_id = self.resolve_location(location)
+        start = parse_month(since) if since is not None else None
+        skill_ids = [self.taxonomy.lookup(skill) for skill in skills]
+        ids = [i if i is not None else -1 for i in skill_ids]
+        if self.store.sql_pushdown(data) and (location_id is not None or start is not None):
+            months, history = self._query_skill_history(data, ids, location_id, start)
+        elif location_id is not None:
+            months, history = aggregates.location_skill_history([location_id] * len(ids), ids)
+        else:
+            months, history = aggregates.skill_history(ids)
+        if start is not None:
+            keep = np.array([month >= start for month in months], dtype=bool)
+            months, history = [month for month, k in zip(months, keep) if k], history[:, keep]
+        
+        return {
+            "months": [month.strftime('%Y-%m') for month in months],
+            "series": [
+                {
+                    "skill": skill,
+                    "canonical": self.taxonomy.names[skill_id] if skill_id is not None else None,
+                    "counts": history[i].tolist(),
+                    "total": int(history[i].sum())
+                }
+                for i, (skill, skill_id) in enumerate(zip(skills, skill_ids))
+            ]
+        }
+    
+    @staticmethod
+    def _query_skill_history(data: JobData, skill_ids: List[int], location_id: Optional[int],
+                             start: Optional[pd.Timestamp]) -> Tuple[List[pd.Timestamp], np.ndarray]:
+        """Like JobAggregates.skill_history, but filtered and grouped by indexed queries on jobs.db"""
+        aggregates = data.aggregates
+        months = [aggregates.months[i] for i in aggregates.month_order()]
+        history = np.zeros((len(skill_ids), len(months)), dtype=np.int64)
+        conn = get_db_connection()
+        if conn is None:
+            return months, history
+        try:
+            counts = job_db.query_skill_history(
+                conn, [i for i in skill_ids if i >= 0],
+                location=aggregates.locations[location_id] if location_id is not None else None,
+                since=start.strftime('%Y-%m-%d') if start is not None else None,
+                up_to_id=(data.watermark or {}).get("max_id"))
+        finally:
+            conn.close()
+        
+        # Queries stop at the version's watermark, so their months are all on its axis
+        columns = {month.strftime('%Y-%m'): c for c, month in enumerate(months)}
+        for skill_id, month, count in counts.itertuples(index=False, name=None):
+            if month in columns:
+                history[np.asarray(skill_ids) == skill_id, columns[month]] = count
+        return months, history
+    
     def _interpret_trend(self, change_pct: float, skill: str = "") -> str:
         """Interpret forecast trend in plain English"""
         skill_name = f" for {skill}" if skill else ""
@@ -148,7 +512,8 @@ class ForecastService:
         else:
             return f"Significant decline{skill_name}: Demand expected to drop by {abs(change_pct):.1f}%. Explore emerging alternatives."
     
-    def _generate_default_forecast(self, skill: str, months: int) -> Dict[str, Any]:
+    def _generate_default_forecast(self, skill: str, months: int, resolution: str = "day",
+                                   layout: str = "rows") -> Dict[str, Any]:
         """Generate default forecast when data is insufficient"""
         import hashlib
         
@@ -159,18 +524,10 @@ class ForecastService:
         base_demand = 30 + (skill_hash % 40)  # Base demand between 30-70
         growth_rate = 0.1 + (skill_hash % 20) / 100.0  # Growth rate between 0.1-0.3
         
-        base_date = datetime.now()
-        forecast_data = []
-        
-        for i in range(months * 30):
-            date = base_date + timedelta(days=i)
-            predicted = base_demand + (i * growth_rate)
-            forecast_data.append({
-                "date": date.strftime('%Y-%m-%d'),
-                "predicted": round(predicted, 2),
-                "lower_bound": round(predicted * 0.8, 2),
-                "upper_bound": round(predicted * 1.2, 2)
-            })
+        days = pd.date_range(datetime.now(), periods=months * 30, freq='D')
+        predicted = base_demand + np.arange(months * 30) * growth_rate
+        values = np.stack([predicted, predicted * 0.8, predicted * 1.2])[:, None, :]
+        forecast_data = self._forecast_points(days, values, resolution, layout)[0]
         
         predicted_demand = base_demand + (months * 30 * growth_rate)
         change_pct = ((predicted_demand - base_demand) / base_demand * 100) if base_demand > 0 else 0
@@ -0,0 +1,141 @@
+"""
+Background precomputation of forecasts for the most-requested skills
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from services.analytics_service import AnalyticsService
+from services.forecast_service import FORECAST_ENGINE, ForecastService
+from utils.job_store import JobData, get_job_store
+from utils.engine_registry import WARMUP_DELAY
+
+# Number of top skills whose forecasts are fitted ahead of requests (0 disables)
+PRECOMPUTE_TOP_N = int(os.environ.get("M2M_PRECOMPUTE_TOP_N", "50"))
+
+# Share of one core the precompute thread may use; it sleeps between fits to stay under it
+PRECOMPUTE_CPU_BUDGET = float(os.environ.get("M2M_PRECOMPUTE_CPU_BUDGET", "0.25"))
+
+class ForecastPrecomputeService:
+    """
+    Keeps forecasts for the top-N skills fitted in the forecast cache.
+
+    A run starts at startup and after every data reload. It fits the
+    current top skills one at a time on a single background thread,
+    skipping those whose history is unchanged and therefore still cached.
+    After each fit the thread sleeps long enough to keep its duty cycle
+    within the CPU budget, so serving is never starved. A reload during
+    a run abandons it in favour of a run on the new data. Fits use the
+    configured engine; with the fast engine, whose fits are not cached,
+    the service does not start at all.
+    """
+
+    def __init__(self, top_n: int = PRECOMPUTE_TOP_N, cpu_budget: float = PRECOMPUTE_CPU_BUDGET,
+                 engine: str = FORECAST_ENGINE):
+        self.store = get_job_store()
+        self.analytics_service = AnalyticsService()
+        self.forecast_service = ForecastService()
+        self.top_n = top_n
+        self.engine = engine.lower()
+        self.cpu_budget = min(max(cpu_budget, 0.01), 1.0)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.current_run: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.store.add_listener(self._on_reload)
+
+    @property
+    def enabled(self) -> bool:
+        # Only Prophet fits are cached; the fast engine is quicker to fit than to look up
+        return self.top_n > 0 and self.engine != "fast"
+
+    def start(self, delay: float = WARMUP_DELAY):
+        """Start the background thread and schedule a first run after `delay` seconds"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(delay,), name="forecast-precompute", daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _on_reload(self, data: JobData):
+        self._wake.set()
+
+    def _loop(self, delay: float):
+        # Let the server answer its first requests before fitting starts
+        if self._stop.wait(delay):
+            return
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error precomputing forecasts: {e}")
+
+    def run_once(self) -> Dict[str, Any]:
+        """Fit missing forecasts for the current top skills"""
+        version = self.store.version
+        run = {"version": version, "started_at": time.time(), "skills": 0, "fitted": 0,
+               "already_cached": 0, "fit_seconds": 0.0, "interrupted": False}
+        self.current_run = run
+        start = time.perf_counter()
+
+        top_skills = [item["skill"] for item in self.analytics_service.get_top_skills(limit=self.top_n)]
+        run["skills"] = len(top_skills)
+        for skill in top_skills:
+            # Newer data (or shutdown) makes this run moot; the next one starts right away
+            if self._wake.is_set() or self._stop.is_set():
+                run["interrupted"] = True
+                break
+
+            fit_start = time.perf_counter()
+            fitted = self.forecast_service.prefit(skill, engine=self.engine)
+            elapsed = time.perf_counter() - fit_start
+            if fitted:
+                run["fitted"] += 1
+                run["fit_seconds"] += elapsed
+                # Sleep so busy time / wall time stays within the budget
+                self._stop.wait(elapsed * (1 - self.cpu_budget) / self.cpu_budget)
+            else:
+                run["already_cached"] += 1
+
+        run["fit_seconds"] = round(run["fit_seconds"], 4)
+        run["seconds"] = round(time.perf_counter() - start, 4)
+        run["finished_at"] = time.time()
+        self.current_run = None
+        self.last_run = run
+        print(f"Precomputed {run['fitted']} forecasts ({run['already_cached']} already cached) "
+              f"for data version {version}")
+        return run
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "engine": self.engine,
+            "top_n": self.top_n,
+            "cpu_budget": self.cpu_budget,
+            "running": self.current_run is not None,
+            "current_run": self.current_run,
+            "last_run": self.last_run,
+        }
+
+_service: Optional[ForecastPrecomputeService] = None
+_service_lock = threading.Lock()
+
+def get_precompute_service() -> ForecastPrecomputeService:
+    """Get the process-wide ForecastPrecomputeService, creating it on first use"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ForecastPrecomputeService()
+    return _service
@@ -8,24 +8,15 @@ from collections import Counter
 import PyPDF2
 import docx
 from io import BytesIO
+from utils.skill_taxonomy import get_skill_taxonomy
 
 class ResumeAnalysisService:
     """Service for analyzing resumes and matching skills"""
     
     def __init__(self):
-        # Common tech skills dictionary
-        self.all_skills = [
-            "python", "java", "javascript", "react", "node.js", "sql", "aws", "docker",
-            "kubernetes", "git", "html", "css", "typescript", "angular", "vue",
-            "mongodb", "postgresql", "mysql", "redis", "elasticsearch", "kafka",
-            "machine learning", "deep learning", "tensorflow", "pytorch", "scikit-learn",
-            "data science", "big data", "spark", "hadoop", "tableau", "power bi",
-            "agile", "scrum", "ci/cd", "jenkins", "terraform", "ansible", "linux",
-            "azure", "gcp", "microservices", "rest api", "graphql", "redux", "webpack",
-            "next.js", "django", "flask", "spring", "express", "fastapi", "laravel",
-            "flutter", "react native", "swift", "kotlin", "go", "rust", "c++", "c#",
-            "php", "ruby", "rails", "nosql", "graphql", "jquery", "bootstrap", "tailwind"
-        ]
+        # Shared canonical skill taxonomy and its compiled text matcher
+        self.taxonomy = get_skill_taxonomy()
+        self.all_skills = self.taxonomy.curated_names
     
     def analyze_resume(self, file_content: bytes, filename: str) -> Dict[str, Any]:
         """Analyze resume file and extract skills"""
@@ -85,25 +76,19 @@ class ResumeAnalysisService:
     
     def _extract_skills_from_text(self, text: str) -> List[str]:
         """Extract skills from resume text"""
-        found_skills = []
-        text_lower = text.lower()
-        
-        for skill in self.all_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill.title())
-        
-        return list(set(found_skills))  # Remove duplicates
+        return self.taxonomy.extract(text)
     
     def _analyze_skills(self, extracted_skills: List[str]) -> List[Dict[str, Any]]:
         """Analyze extracted skills"""
         analysis = []
+        extracted = set(extracted_skills)
         
         for skill in self.all_skills:
-            found = skill.title() in extracted_skills
+            found = skill in extracted
             relevance = 1.0 if found else 0.0
             
             analysis.append({
-                "skill": skill.title(),
+                "skill": skill,
                 "found": found,
                 "relevance": relevance
             })
@@ -128,19 +113,20 @@ class ResumeAnalysisService:
         }
         
         job_matches = []
-        skills_lower = [s.lower() for s in skills]
+        skill_ids = {self.taxonomy.lookup(s) for s in skills} - {None}
         
-        for role, required_skills in job_requirements.items():
-            matched_skills = [s for s in required_skills if s in skills_lower]
-            missing_skills = [s for s in required_skills if s not in skills_lower]
+        for role, requirements in job_requirements.items():
+            required_skills = [self.taxonomy.canonical(s) for s in requirements]
+            matched_skills = [s for s in required_skills if self.taxonomy.lookup(s) in skill_ids]
+            missing_skills = [s for s in required_skills if self.taxonomy.lookup(s) not in skill_ids]
             
             match_score = len(matched_skills) / len(required_skills) * 100 if required_skills else 0
             
             job_matches.append({
                 "role": role,
                 "match_score": round(match_score, 2),
-                "missing_skills": [s.title() for s in missing_skills],
-                "matched_skills": [s.title() for s in matched_skills]
+                "missing_skills": missing_skills,
+                "matched_skills": matched_skills
             })
         
         # Sort by match score
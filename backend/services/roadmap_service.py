@@ -4,6 +4,7 @@ Service for generating skill learning roadmaps
 
 from typing import Dict, Any, List
 import random
+from utils.skill_taxonomy import get_skill_taxonomy
 
 class RoadmapService:
     """Service for generating skill learning roadmaps"""
@@ -89,7 +90,8 @@ class RoadmapService:
     
     def generate_roadmap(self, skill: str) -> Dict[str, Any]:
         """Generate learning roadmap for a skill"""
-        skill_lower = skill.lower()
+        # Resolve aliases ("js", "reactjs") to the canonical skill first
+        skill_lower = get_skill_taxonomy().canonical(skill).lower()
         
         # Check if predefined roadmap exists
         if skill_lower in self.ROADMAPS:
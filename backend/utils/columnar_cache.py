@@ -0,0 +1,177 @@
+"""
+Columnar, memory-mapped snapshot of clean_jobs.csv (Arrow IPC format)
+"""
+
+import hashlib
+import json
+import os
+import pandas as pd
+from typing import Dict, Any, Optional
+
+# pyarrow is optional: without it the loader simply parses the CSV every time
+pa = None
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except (ImportError, OSError) as e:
+    print(f"Warning: pyarrow not available, columnar job cache disabled: {e}")
+
+# Bump when the snapshot layout changes so old snapshots are rebuilt
+SNAPSHOT_FORMAT_VERSION = 1
+
+CATEGORICAL_COLUMNS = ["location", "title", "company"]
+
+def is_enabled() -> bool:
+    """Whether snapshots can be used in this process"""
+    return pa is not None and os.environ.get("M2M_COLUMNAR_CACHE", "1") != "0"
+
+def _paths(csv_path: str) -> Dict[str, str]:
+    return {
+        "jobs": csv_path + ".arrow",
+        "skills": csv_path + ".skills.arrow",
+        "meta": csv_path + ".meta.json",
+    }
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_atomic(path: str, write) -> None:
+    """Write via a per-process temp file and rename, so concurrent workers never see partial files"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _is_fresh(csv_path: str, paths: Dict[str, str]) -> bool:
+    """Check the snapshot against the CSV by mtime/size, falling back to a content hash"""
+    meta = _read_meta(paths["meta"])
+    if meta is None or meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return False
+    if not all(os.path.exists(paths[k]) for k in ("jobs", "skills")):
+        return False
+
+    stat = os.stat(csv_path)
+    if meta.get("csv_mtime_ns") == stat.st_mtime_ns and meta.get("csv_size") == stat.st_size:
+        return True
+
+    # Touched but possibly unchanged (e.g. a fresh checkout): compare content
+    if meta.get("csv_size") != stat.st_size or meta.get("csv_sha256") != _file_hash(csv_path):
+        return False
+    meta.update({"csv_mtime_ns": stat.st_mtime_ns})
+    _write_atomic(paths["meta"], lambda p: _dump_json(meta, p))
+    return True
+
+def _dump_json(data: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+def _read_table(path: str) -> "pa.Table":
+    # Memory-mapped reads let workers on one host share the page cache
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+def _arrow_dtype(arrow_type: "pa.DataType") -> Optional[pd.ArrowDtype]:
+    """Keep columns Arrow-backed, except dictionary columns, which stay pandas categoricals"""
+    if pa.types.is_dictionary(arrow_type):
+        return None
+    return pd.ArrowDtype(arrow_type)
+
+def _to_pandas(table: "pa.Table") -> pd.DataFrame:
+    """
+    DataFrame over the table's buffers. Arrow-backed columns point into
+    the memory map instead of being copied into NumPy arrays, so their
+    pages stay shared between workers; only categorical codes are copied.
+    """
+    return table.to_pandas(types_mapper=_arrow_dtype)
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Pre-parse dates and dictionary-encode repetitive text columns"""
+    df = df.copy()
+    if 'posted_date' in df.columns:
+        df['posted_date'] = pd.to_datetime(df['posted_date'], errors='coerce')
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+def explode_skills(df: pd.DataFrame) -> pd.DataFrame:
+    """One (job row, skill) pair per comma-separated entry of the skills column"""
+    if 'skills' not in df.columns:
+        return pd.DataFrame({"job": pd.Series([], dtype="int32"), "skill": pd.Categorical([])})
+    column = df['skills'].reset_index(drop=True)
+    column = column[column.map(lambda v: isinstance(v, str))]
+    exploded = column.str.split(',').explode().str.strip()
+    exploded = exploded[exploded != '']
+    return pd.DataFrame({
+        "job": exploded.index.to_numpy(dtype="int32"),
+        "skill": pd.Categorical(exploded.to_numpy()),
+    })
+
+def write_snapshot(csv_path: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Write the columnar snapshot for a freshly parsed CSV and return the prepared frame"""
+    paths = _paths(csv_path)
+    prepared = _prepare(df)
+    stat = os.stat(csv_path)
+    meta = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "csv_mtime_ns": stat.st_mtime_ns,
+        "csv_size": stat.st_size,
+        "csv_sha256": _file_hash(csv_path),
+        "rows": len(prepared),
+    }
+
+    def write_table(frame: pd.DataFrame, path: str) -> None:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        # Uncompressed so the file can be memory-mapped without decoding
+        with pa.OSFile(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    _write_atomic(paths["jobs"], lambda p: write_table(prepared, p))
+    _write_atomic(paths["skills"], lambda p: write_table(explode_skills(df), p))
+    _write_atomic(paths["meta"], lambda p: _dump_json(meta, p))
+    return prepared
+
+def load_jobs(csv_path: str, csv_size: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """Load jobs from a fresh snapshot (built from `csv_size` bytes, if given), or None if there is none"""
+    if not is_enabled() or not os.path.exists(csv_path):
+        return None
+    paths = _paths(csv_path)
+    try:
+        meta = _read_meta(paths["meta"])
+        if meta is None or (csv_size is not None and meta.get("csv_size") != csv_size):
+            return None
+        if not _is_fresh(csv_path, paths):
+            return None
+        return _to_pandas(_read_table(paths["jobs"]))
+    except Exception as e:
+        print(f"Error reading job snapshot: {e}")
+        return None
+
+def load_skill_pairs(csv_path: str, expected_rows: int) -> Optional[pd.DataFrame]:
+    """Load exploded (job, skill) pairs from a fresh snapshot matching `expected_rows` jobs"""
+    if not is_enabled() or not os.path.exists(csv_path):
+        return None
+    paths = _paths(csv_path)
+    try:
+        meta = _read_meta(paths["meta"])
+        if meta is None or meta.get("rows") != expected_rows or not _is_fresh(csv_path, paths):
+            return None
+        return _to_pandas(_read_table(paths["skills"]))
+    except Exception as e:
+        print(f"Error reading skill snapshot: {e}")
+        return None
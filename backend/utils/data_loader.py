@@ -5,26 +5,82 @@ Utility functions for loading and processing job data
 import pandas as pd
 import sqlite3
 import os
-from typing import List, Dict, Any
+import io
+import hashlib
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from utils import columnar_cache
+from utils.skill_taxonomy import get_skill_taxonomy
 
 # Paths to data files
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 JOBS_DB_PATH = os.path.join(DATA_DIR, "jobs.db")
 CLEAN_JOBS_CSV = os.path.join(DATA_DIR, "processed", "clean_jobs.csv")
 
+# Bytes hashed at the end of the CSV to tell appended rows from a rewritten file
+_CSV_TAIL_BYTES = 4096
+
 def get_db_connection():
     """Create SQLite database connection"""
     if not os.path.exists(JOBS_DB_PATH):
         return None
     return sqlite3.connect(JOBS_DB_PATH)
 
-def load_clean_jobs() -> pd.DataFrame:
-    """Load clean jobs data from CSV"""
+class _BoundedReader(io.RawIOBase):
+    """Read-only view of a file that ends after its first `limit` bytes"""
+
+    def __init__(self, f, limit: int):
+        self._f = f
+        self._remaining = limit
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        data = self._f.read(n)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+def _open_csv(f, max_bytes: Optional[int]):
+    """`f`, or a view of it that stops after `max_bytes`"""
+    return io.BufferedReader(_BoundedReader(f, max_bytes)) if max_bytes is not None else f
+
+def _read_csv(max_bytes: Optional[int] = None) -> pd.DataFrame:
+    """Parse the clean jobs CSV, stopping after `max_bytes` (a watermark's size) if given"""
+    with open(CLEAN_JOBS_CSV, "rb") as f:
+        return pd.read_csv(_open_csv(f, max_bytes))
+
+def iter_csv_chunks(chunk_size: int, max_bytes: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Stream the clean jobs CSV in chunks, stopping after `max_bytes` if given"""
+    with open(CLEAN_JOBS_CSV, "rb") as f:
+        with pd.read_csv(_open_csv(f, max_bytes), chunksize=chunk_size) as reader:
+            yield from reader
+
+def load_clean_jobs(max_bytes: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load clean jobs data, from the columnar snapshot when it is up to date.
+
+    With `max_bytes` only that many bytes of the CSV are read, and the
+    snapshot is used only if it was built from exactly that many.
+    """
     if not os.path.exists(CLEAN_JOBS_CSV):
         return pd.DataFrame()
     
+    df = columnar_cache.load_jobs(CLEAN_JOBS_CSV, csv_size=max_bytes)
+    if df is not None:
+        return df
+    
     try:
-        df = pd.read_csv(CLEAN_JOBS_CSV)
+        df = _read_csv(max_bytes)
+        # A snapshot describes the whole file, so only a read that covered all of it is saved
+        if columnar_cache.is_enabled() and (max_bytes is None or max_bytes == os.path.getsize(CLEAN_JOBS_CSV)):
+            try:
+                df = columnar_cache.write_snapshot(CLEAN_JOBS_CSV, df)
+            except Exception as e:
+                print(f"Error writing job snapshot: {e}")
         return df
     except Exception as e:
         print(f"Error loading CSV: {e}")
@@ -47,35 +103,101 @@ def load_jobs_from_db() -> pd.DataFrame:
             conn.close()
         return pd.DataFrame()
 
+def get_db_max_id() -> Optional[int]:
+    """Highest job id in the database (None if unavailable)"""
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute("SELECT MAX(id) FROM jobs").fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+    except Exception as e:
+        print(f"Error reading max id from DB: {e}")
+        return None
+    finally:
+        conn.close()
+
+def load_jobs_from_db_after(last_id: int) -> pd.DataFrame:
+    """Load jobs with an id greater than `last_id`"""
+    conn = get_db_connection()
+    if conn is None:
+        return pd.DataFrame()
+    try:
+        return pd.read_sql_query("SELECT * FROM jobs WHERE id > ? ORDER BY id", conn, params=(last_id,))
+    except Exception as e:
+        print(f"Error loading new jobs from DB: {e}")
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+def _csv_watermark_at(f, size: int, mtime_ns: int) -> Dict[str, Any]:
+    start = max(0, size - _CSV_TAIL_BYTES)
+    f.seek(start)
+    return {
+        "size": size,
+        "mtime_ns": mtime_ns,
+        "tail_digest": hashlib.sha1(f.read(size - start)).hexdigest(),
+    }
+
+def get_csv_watermark() -> Optional[Dict[str, Any]]:
+    """Size, mtime and a digest of the last bytes of the CSV (None if missing)"""
+    if not os.path.exists(CLEAN_JOBS_CSV):
+        return None
+    with open(CLEAN_JOBS_CSV, "rb") as f:
+        stat = os.fstat(f.fileno())
+        return _csv_watermark_at(f, stat.st_size, stat.st_mtime_ns)
+
+def load_csv_appended(watermark: Dict[str, Any]) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+    """
+    Rows appended to the CSV since `watermark`, with the new watermark.
+
+    Returns None when the file was rewritten rather than appended to (it
+    shrank or the bytes before the old end changed), in which case the
+    caller has to reload it in full. A trailing partial line is left for
+    the next call.
+    """
+    if not os.path.exists(CLEAN_JOBS_CSV):
+        return None
+    try:
+        with open(CLEAN_JOBS_CSV, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < watermark["size"]:
+                return None
+            if _csv_watermark_at(f, watermark["size"], 0)["tail_digest"] != watermark["tail_digest"]:
+                return None
+            appended = f.read(stat.st_size - watermark["size"])
+            appended = appended[:appended.rfind(b"\n") + 1]
+            current = _csv_watermark_at(f, watermark["size"] + len(appended), stat.st_mtime_ns)
+            f.seek(0)
+            header = f.readline()
+        if not appended.strip():
+            return pd.DataFrame(), current
+        return pd.read_csv(io.BytesIO(header + appended)), current
+    except Exception as e:
+        print(f"Error reading appended CSV rows: {e}")
+        return None
+
+def load_all_jobs(max_csv_bytes: Optional[int] = None) -> Tuple[pd.DataFrame, str]:
+    """Get all jobs data and where it came from ("csv", "db" or "none"), reading the CSV up to `max_csv_bytes`"""
+    df = load_clean_jobs(max_csv_bytes)
+    if not df.empty:
+        return df, "csv"
+    df = load_jobs_from_db()
+    return df, "db" if not df.empty else "none"
+
 def get_all_jobs() -> pd.DataFrame:
     """Get all jobs data, preferring CSV over DB"""
-    df = load_clean_jobs()
-    if df.empty:
-        df = load_jobs_from_db()
-    return df
+    return load_all_jobs()[0]
+
+def load_skill_pairs(source: str, n_rows: int) -> Optional[pd.DataFrame]:
+    """Pre-exploded (job, skill) pairs for a dataset, if a snapshot has them"""
+    if source != "csv":
+        return None
+    return columnar_cache.load_skill_pairs(CLEAN_JOBS_CSV, n_rows)
 
 def extract_skills_from_description(description: str) -> List[str]:
     """Extract skills from job description text"""
     if pd.isna(description):
         return []
     
-    # Common tech skills keywords
-    skill_keywords = [
-        "python", "java", "javascript", "react", "node", "sql", "aws", "docker",
-        "kubernetes", "git", "html", "css", "typescript", "angular", "vue",
-        "mongodb", "postgresql", "mysql", "redis", "elasticsearch", "kafka",
-        "machine learning", "deep learning", "tensorflow", "pytorch", "scikit-learn",
-        "data science", "big data", "spark", "hadoop", "tableau", "power bi",
-        "agile", "scrum", "ci/cd", "jenkins", "terraform", "ansible", "linux",
-        "azure", "gcp", "microservices", "rest api", "graphql", "redux", "webpack"
-    ]
-    
-    description_lower = description.lower()
-    found_skills = []
-    
-    for skill in skill_keywords:
-        if skill in description_lower:
-            found_skills.append(skill.title())
-    
-    return list(set(found_skills))
-
+    return get_skill_taxonomy().extract(str(description))
@@ -0,0 +1,168 @@
+"""
+Disk-backed cache of phrase embeddings, memory-mapped and shared across workers
+"""
+
+import hashlib
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Callable, List, Optional
+from utils.data_loader import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within a process
+    fcntl = None
+
+EMBEDDING_CACHE_DIR = os.environ.get("M2M_EMBEDDING_CACHE_DIR", os.path.join(DATA_DIR, "cache", "embeddings"))
+
+# Phrases passed to the model per call when encoding cache misses
+EMBEDDING_BATCH_SIZE = int(os.environ.get("M2M_EMBEDDING_BATCH_SIZE", "256"))
+
+# An encoder maps a list of phrases to a (phrases x dim) array
+Encoder = Callable[[List[str]], np.ndarray]
+
+def phrase_keys(phrases: List[str]) -> np.ndarray:
+    """Stable 64-bit keys of phrase texts"""
+    return np.array([int.from_bytes(hashlib.blake2b(p.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+                     for p in phrases], dtype=np.int64)
+
+class EmbeddingCache:
+    """
+    Embeddings of one model, keyed by a hash of the phrase text.
+
+    Vectors are appended to a raw float32 file that is memory-mapped for
+    reads, next to a file of int64 phrase keys in the same row order, so
+    lookups touch only the rows they need and the cache survives restarts.
+    Each model gets its own directory, so switching models never mixes
+    vector spaces. Only phrases not seen before are encoded, in batches
+    of `batch_size`.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str = EMBEDDING_CACHE_DIR,
+                 batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = max(batch_size, 1)
+        self.path = os.path.join(cache_dir, re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name))
+        self._keys_path = os.path.join(self.path, "keys.i64")
+        self._vectors_path = os.path.join(self.path, "vectors.f32")
+        self._dim_path = os.path.join(self.path, "dim")
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.rows = 0
+        self._index = pd.Index(np.zeros(0, dtype=np.int64))
+        self._positions = np.zeros(0, dtype=np.int64)
+        self._vectors: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def _refresh(self):
+        """Re-read the index if this or another process appended rows (call with the lock held)"""
+        if self.dim is None and os.path.exists(self._dim_path):
+            with open(self._dim_path) as f:
+                self.dim = int(f.read().strip())
+        if self.dim is None or not os.path.exists(self._keys_path) or not os.path.exists(self._vectors_path):
+            return
+        # Vectors are written before keys, so rows with a key always have a full vector
+        rows = min(os.path.getsize(self._keys_path) // 8,
+                   os.path.getsize(self._vectors_path) // (4 * self.dim))
+        if rows != self.rows:
+            keys = np.fromfile(self._keys_path, dtype=np.int64, count=rows)
+            # Without file locks (Windows) two workers may store a phrase twice; the first copy wins
+            first = ~pd.Index(keys).duplicated()
+            self._index = pd.Index(keys[first])
+            self._positions = np.flatnonzero(first)
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode='r',
+                                      shape=(rows, self.dim)) if rows else None
+            self.rows = rows
+
+    def _lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key, or -1 (call with the lock held)"""
+        found = self._index.get_indexer(keys)
+        return np.where(found >= 0, self._positions[np.maximum(found, 0)] if len(self._positions) else -1, -1)
+
+    def encode(self, phrases: List[str], encoder: Encoder) -> np.ndarray:
+        """(phrases x dim) float32 embeddings, running `encoder` only on phrases not cached yet"""
+        keys = phrase_keys(phrases)
+        with self._lock:
+            self._refresh()
+            rows = self._lookup(keys)
+            missing = rows < 0
+            self.hits += int((~missing).sum())
+            self.misses += int(missing.sum())
+
+        if missing.any():
+            # Each distinct unseen phrase is encoded once, however often it repeats
+            new_keys, first = np.unique(keys[missing], return_index=True)
+            new_phrases = [phrases[i] for i in np.flatnonzero(missing)[first]]
+            vectors = [np.asarray(encoder(new_phrases[start:start + self.batch_size]), dtype=np.float32)
+                       for start in range(0, len(new_phrases), self.batch_size)]
+            self.batches += len(vectors)
+            self._append(new_keys, np.vstack(vectors))
+            with self._lock:
+                self._refresh()
+                rows = self._lookup(keys)
+
+        if len(rows) == 0:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return np.asarray(self._vectors[rows])
+
+    def _append(self, keys: np.ndarray, vectors: np.ndarray):
+        """Append rows, holding an exclusive file lock so workers never interleave writes"""
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, open(os.path.join(self.path, "lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._dim_path, "w") as f:
+                    f.write(str(self.dim))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {vectors.shape[1]} does not match cached size {self.dim}")
+
+            # Another worker may have added some of these meanwhile
+            fresh = self._lookup(keys) < 0
+            # Truncating to the consistent row count drops a write cut short by a crash
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(self.rows * 4 * self.dim)
+                f.write(np.ascontiguousarray(vectors[fresh]).tobytes())
+            with open(self._keys_path, "ab") as f:
+                f.truncate(self.rows * 8)
+                f.write(keys[fresh].tobytes())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "entries": len(self._index),
+                "rows": self.rows,
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "batches_encoded": self.batches,
+                "path": self.path,
+            }
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model_name: str) -> EmbeddingCache:
+    """Get the process-wide EmbeddingCache of a model, creating it on first use"""
+    cache = _caches.get(model_name)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(model_name, EmbeddingCache(model_name))
+    return cache
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    """Stats of every embedding cache opened in this process"""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in sorted(caches.items())}
@@ -0,0 +1,68 @@
+"""
+Burst detection over phrase x period mention counts
+"""
+
+import os
+import numpy as np
+from typing import Dict
+
+# Periods (months) scored as recent, and periods before them used as the baseline
+EMERGENCE_WINDOW = int(os.environ.get("M2M_EMERGENCE_WINDOW", "3"))
+EMERGENCE_BASELINE = int(os.environ.get("M2M_EMERGENCE_BASELINE", "12"))
+
+def burst_scores(counts: np.ndarray, totals: np.ndarray, window: int = EMERGENCE_WINDOW,
+                 baseline: int = EMERGENCE_BASELINE) -> Dict[str, np.ndarray]:
+    """
+    Emergence statistics of every row of a (series x periods) count matrix.
+
+    `totals` holds the number of postings in each period. The last `window`
+    periods are compared with up to `baseline` periods right before them,
+    as rates per posting so that busier months do not look like growth:
+
+    - recent, base: mentions in the recent and baseline windows
+    - growth: ratio of the recent to the baseline rate (smoothed by half a mention)
+    - burst: Poisson z-score of the recent mentions against the count the
+      baseline rate predicts for the recent postings
+    - acceleration: least-squares slope of the per-period rate across the
+      recent window, in baseline rates per period
+
+    Everything is computed for all rows at once.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    periods = counts.shape[1]
+    window = max(1, min(window, periods))
+    baseline = max(0, min(baseline, periods - window))
+
+    recent_counts, recent_totals = counts[:, periods - window:], totals[periods - window:]
+    base_counts = counts[:, periods - window - baseline:periods - window]
+    base_totals = totals[periods - window - baseline:periods - window]
+
+    recent = recent_counts.sum(axis=1)
+    base = base_counts.sum(axis=1)
+    recent_postings = recent_totals.sum()
+    base_postings = base_totals.sum()
+
+    recent_rate = (recent + 0.5) / (recent_postings + 1.0)
+    # With no earlier periods there is nothing to grow from
+    base_rate = (base + 0.5) / (base_postings + 1.0) if baseline else recent_rate
+    expected = base_rate * recent_postings
+    burst = (recent - expected) / np.sqrt(np.maximum(expected, 1.0))
+
+    # Slope of mentions per posting over the recent periods that had postings
+    observed = recent_totals > 0
+    acceleration = np.zeros(len(counts))
+    if observed.sum() >= 2:
+        x = np.flatnonzero(observed).astype(np.float64)
+        x -= x.mean()
+        rates = recent_counts[:, observed] / recent_totals[observed]
+        slope = (rates - rates.mean(axis=1, keepdims=True)) @ x / np.square(x).sum()
+        acceleration = slope / base_rate
+
+    return {
+        "recent": recent.astype(np.int64),
+        "base": base.astype(np.int64),
+        "growth": recent_rate / base_rate,
+        "burst": burst,
+        "acceleration": acceleration,
+    }
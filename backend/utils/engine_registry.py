@@ -0,0 +1,125 @@
+"""
+Lazily loaded heavy engines (Prophet, sentence-transformers) with background warm-up
+"""
+
+import importlib
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional
+
+# Load every registered engine in the background after startup (M2M_WARMUP=0 loads on first use only)
+WARMUP = os.environ.get("M2M_WARMUP", "1") != "0"
+
+# Seconds to wait after startup before warming up, so the first requests are not competing with it
+WARMUP_DELAY = float(os.environ.get("M2M_WARMUP_DELAY", "1.0"))
+
+_import_seconds: Dict[str, float] = {}
+_import_lock = threading.Lock()
+
+def timed_import(name: str) -> ModuleType:
+    """Import a module, recording how long its first import took"""
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _import_lock:
+        _import_seconds.setdefault(name, round(time.perf_counter() - start, 4))
+    return module
+
+def import_times() -> Dict[str, float]:
+    """Seconds taken by each import made through timed_import, in import order"""
+    with _import_lock:
+        return dict(_import_seconds)
+
+class Engine:
+    """
+    A heavy library or model, loaded once by whichever comes first: a
+    request that needs it or the background warm-up.
+
+    Concurrent callers wait for the one load in progress. A failed load
+    marks the engine unavailable instead of raising, so callers can fall
+    back; `require()` raises for callers that cannot.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.status = "not_loaded"  # loading, ready, unavailable
+        self.value: Any = None
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def settled(self) -> bool:
+        return self.status in ("ready", "unavailable")
+
+    def get(self) -> Any:
+        """The loaded engine, loading it now if needed; None if it cannot be loaded"""
+        if not self.settled:
+            with self._lock:
+                if not self.settled:
+                    self._load()
+        return self.value
+
+    def require(self) -> Any:
+        """The loaded engine, raising RuntimeError if it cannot be loaded"""
+        value = self.get()
+        if self.status != "ready":
+            raise RuntimeError(f"{self.name} is not available: {self.error}")
+        return value
+
+    def _load(self):
+        self.status = "loading"
+        start = time.perf_counter()
+        try:
+            self.value = self.loader()
+            self.status = "ready"
+        except Exception as e:
+            print(f"Error loading {self.name}: {e}")
+            self.error = str(e)
+            self.status = "unavailable"
+        self.seconds = round(time.perf_counter() - start, 4)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"status": self.status, "seconds": self.seconds, "error": self.error}
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+_warmup: Dict[str, Any] = {"enabled": WARMUP, "started": False, "finished": False, "seconds": None}
+
+def register_engine(name: str, loader: Callable[[], Any]) -> Engine:
+    """Register a lazily loaded engine; registering a name again returns the existing one"""
+    with _engines_lock:
+        return _engines.setdefault(name, Engine(name, loader))
+
+def start_warmup(delay: float = WARMUP_DELAY):
+    """Load all registered engines one after another on a daemon thread"""
+    if not WARMUP or _warmup["started"]:
+        return
+    _warmup["started"] = True
+
+    def warm():
+        time.sleep(delay)
+        start = time.perf_counter()
+        with _engines_lock:
+            engines = list(_engines.values())
+        for engine in engines:
+            engine.get()
+        _warmup["seconds"] = round(time.perf_counter() - start, 4)
+        _warmup["finished"] = True
+        print(f"Warm-up finished in {_warmup['seconds']:.2f}s: "
+              + ", ".join(f"{e.name} {e.status}" for e in engines))
+
+    threading.Thread(target=warm, name="engine-warmup", daemon=True).start()
+
+def readiness() -> Dict[str, Any]:
+    """Which engines are loaded, warm-up progress and the recorded import times"""
+    with _engines_lock:
+        engines = dict(_engines)
+    return {
+        "ready": all(engine.settled for engine in engines.values()),
+        "engines": {name: engine.stats() for name, engine in sorted(engines.items())},
+        "warmup": dict(_warmup),
+        "imports": import_times(),
+    }
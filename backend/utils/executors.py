@@ -0,0 +1,159 @@
+"""
+Bounded executors that keep blocking, CPU-heavy calls off the event loop
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Callable
+
+# Concurrent calls allowed per endpoint unless overridden with M2M_<NAME>_CONCURRENCY
+DEFAULT_CONCURRENCY = {
+    "forecast": 2,
+    "emerging": 1,
+    "resume": 2,
+    "reload": 1,
+    "tasks": 4,
+}
+FALLBACK_CONCURRENCY = 4
+
+# Calls allowed to wait for a slot before new ones are rejected (M2M_<NAME>_MAX_QUEUE)
+DEFAULT_MAX_QUEUE = int(os.environ.get("M2M_EXECUTOR_MAX_QUEUE", "32"))
+
+class ExecutorSaturatedError(Exception):
+    """Raised when an endpoint's executor queue is full"""
+
+class EndpointExecutor:
+    """
+    A thread pool dedicated to one endpoint.
+
+    The pool size is the endpoint's concurrency limit, so a burst of slow
+    requests (Prophet fits, embedding, PDF parsing) queues behind its own
+    workers instead of blocking the event loop or other endpoints' pools.
+    When more than `max_queue` calls are waiting, new calls are rejected.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"m2m-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` on this endpoint's pool and await its result"""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturatedError(
+                    f"Too many pending {self.name} requests ({self.queued} queued), try again later"
+                )
+            self.queued += 1
+        return await asyncio.wrap_future(self._submit(functools.partial(fn, *args, **kwargs)))
+
+    def run_sync(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on this endpoint's pool from a plain thread and wait for it
+
+        For background task workers: they share the endpoint's concurrency
+        limit but wait for a slot instead of being rejected, since the task
+        queue already bounds how many of them there are.
+        """
+        with self._lock:
+            self.queued += 1
+        return self._submit(functools.partial(fn, *args, **kwargs)).result()
+
+    def _submit(self, fn: Callable) -> Future:
+        """Submit a call already counted in `queued`, tracking its wait and run time"""
+        submitted = time.perf_counter()
+
+        def call():
+            started = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.wait_seconds += started - submitted
+            ok = False
+            try:
+                result = fn()
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.busy_seconds += time.perf_counter() - started
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        def release_if_cancelled(future: Future):
+            # A call cancelled while queued (e.g. its client disconnected) never runs `call`
+            if future.cancelled():
+                with self._lock:
+                    self.queued -= 1
+
+        future = self._pool.submit(call)
+        future.add_done_callback(release_if_cancelled)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "concurrency": self.concurrency,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_seconds": round(self.wait_seconds / finished, 4) if finished else 0.0,
+                "avg_run_seconds": round(self.busy_seconds / finished, 4) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+_executors: Dict[str, EndpointExecutor] = {}
+_executors_lock = threading.Lock()
+
+def get_executor(name: str) -> EndpointExecutor:
+    """Get the executor for an endpoint group, creating it with its configured limits"""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                env = name.upper()
+                concurrency = int(os.environ.get(f"M2M_{env}_CONCURRENCY",
+                                                 DEFAULT_CONCURRENCY.get(name, FALLBACK_CONCURRENCY)))
+                max_queue = int(os.environ.get(f"M2M_{env}_MAX_QUEUE", DEFAULT_MAX_QUEUE))
+                executor = _executors[name] = EndpointExecutor(name, max(concurrency, 1), max_queue)
+    return executor
+
+async def run_blocking(name: str, fn: Callable, *args, **kwargs) -> Any:
+    """Run a blocking call on the named endpoint executor"""
+    return await get_executor(name).run(functools.partial(fn, *args, **kwargs))
+
+def executor_stats() -> Dict[str, Any]:
+    """Concurrency, queue depth and timing of every endpoint executor"""
+    with _executors_lock:
+        executors = dict(_executors)
+    return {name: executor.stats() for name, executor in sorted(executors.items())}
+
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
@@ -0,0 +1,72 @@
+"""
+Backtest the Prophet and fast forecast engines on the job data
+
+Usage (from backend/): python -m utils.forecast_backtest [--skills 20] [--holdout 2]
+"""
+
+import argparse
+import time
+import numpy as np
+from typing import Dict, Any, List
+from utils.job_store import get_job_store
+from utils.skill_matrix import SkillMatrix
+from utils.fast_forecast import DampedTrendForecaster
+
+def _errors(actual: np.ndarray, predicted: np.ndarray) -> Dict[str, float]:
+    """Mean absolute error and symmetric MAPE (in %)"""
+    denominator = np.abs(actual) + np.abs(predicted)
+    smape = np.where(denominator > 0, 2 * np.abs(actual - predicted) / np.maximum(denominator, 1e-9), 0.0)
+    return {"mae": round(float(np.mean(np.abs(actual - predicted))), 4),
+            "smape": round(float(np.mean(smape) * 100), 2)}
+
+def run_backtest(n_skills: int = 20, holdout: int = 2, engines: List[str] = ("fast", "prophet")) -> Dict[str, Any]:
+    """
+    Hold out the last `holdout` months of the top `n_skills` skills, fit
+    each engine on the months before and score its forecasts for the
+    held-out months. Returns per-engine error and latency.
+    """
+    aggregates = get_job_store().aggregates
+    skill_ids = SkillMatrix.top_k(aggregates.skill_counts, n_skills).tolist()
+    months, history = aggregates.skill_history(skill_ids)
+    if len(months) <= holdout + 2:
+        return {"error": f"Need more than {holdout + 2} months of history, have {len(months)}"}
+
+    train, actual = history[:, :-holdout].astype(float), history[:, -holdout:].astype(float)
+    keep = train.sum(axis=1) > 0
+    skill_ids, train, actual = [s for s, k in zip(skill_ids, keep) if k], train[keep], actual[keep]
+    results: Dict[str, Any] = {"skills": len(skill_ids), "months": len(months), "holdout": holdout}
+
+    if "fast" in engines:
+        start = time.perf_counter()
+        predicted, _, _ = DampedTrendForecaster().fit(train).predict(np.arange(1, holdout + 1))
+        seconds = time.perf_counter() - start
+        results["fast"] = dict(_errors(actual, predicted), seconds=round(seconds, 4),
+                               ms_per_series=round(seconds * 1000 / len(skill_ids), 3))
+
+    if "prophet" in engines:
+        from services.forecast_service import ForecastService, fit_prophet
+        service = ForecastService()
+        names = aggregates.skill_names
+        predicted = np.zeros_like(actual)
+        start = time.perf_counter()
+        for i, skill_id in enumerate(skill_ids):
+            # The service's own input (every month from the first posting, zeros included), minus the holdout
+            df_prophet = service._history_frame(names[skill_id])
+            df_prophet = df_prophet[df_prophet['ds'] < months[-holdout]]
+            forecast = fit_prophet(df_prophet).set_index('ds')['yhat']
+            predicted[i] = forecast.reindex(months[-holdout:]).to_numpy()
+        seconds = time.perf_counter() - start
+        results["prophet"] = dict(_errors(actual, predicted), seconds=round(seconds, 4),
+                                  ms_per_series=round(seconds * 1000 / len(skill_ids), 3))
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare forecast engines on held-out months")
+    parser.add_argument("--skills", type=int, default=20, help="Number of top skills to backtest")
+    parser.add_argument("--holdout", type=int, default=2, help="Months held out for scoring")
+    parser.add_argument("--engines", default="fast,prophet", help="Comma-separated engines to compare")
+    args = parser.parse_args()
+    report = run_backtest(args.skills, args.holdout, args.engines.split(","))
+    for name, value in report.items():
+        print(f"{name}: {value}")
@@ -0,0 +1,163 @@
+"""
+In-memory and on-disk cache of fitted forecast frames
+"""
+
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from utils.data_loader import DATA_DIR
+
+FORECAST_CACHE_DIR = os.environ.get("M2M_FORECAST_CACHE_DIR", os.path.join(DATA_DIR, "cache", "forecasts"))
+
+# Maximum number of forecast frames kept in memory
+FORECAST_CACHE_SIZE = int(os.environ.get("M2M_FORECAST_CACHE_SIZE", "128"))
+
+# Maximum size of the pickles on disk; least recently used ones are deleted beyond it
+FORECAST_DISK_CACHE_BYTES = int(float(os.environ.get("M2M_FORECAST_DISK_CACHE_MB", "256")) * 1024 * 1024)
+
+# Bump when the cached frame layout changes so old entries are ignored
+FORECAST_CACHE_FORMAT_VERSION = 1
+
+class ForecastCache:
+    """
+    Caches a model's forecast frame keyed by (skill, history, model config).
+
+    The key hashes the exact history the model is fitted on rather than
+    the store's version number, so entries survive restarts and reloads
+    that do not touch a skill's history, and can never be served for a
+    history that changed. Frames live in an LRU in memory and as pickles
+    on disk, shared by all workers on the host. Reading a pickle touches
+    its mtime, and each write deletes the pickles least recently used
+    until the directory is back under `max_disk_bytes`, so entries for
+    superseded histories age out instead of piling up.
+    """
+
+    def __init__(self, cache_dir: str = FORECAST_CACHE_DIR, max_entries: int = FORECAST_CACHE_SIZE,
+                 max_disk_bytes: int = FORECAST_DISK_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def make_key(skill: str, history: pd.DataFrame, config: Dict[str, Any]) -> str:
+        """Stable key for a skill's history (`ds`, `y` columns) and model configuration"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps({"skill": skill, "config": config,
+                                  "format": FORECAST_CACHE_FORMAT_VERSION}, sort_keys=True).encode())
+        digest.update(pd.util.hash_pandas_object(history[['ds', 'y']], index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached frame for `key`, from memory or disk, or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key]
+
+        path = self._path(key)
+        if os.path.exists(path):
+            try:
+                frame = pd.read_pickle(path)
+                # Recently read entries are the last to be pruned
+                os.utime(path)
+                self._remember(key, frame)
+                with self._lock:
+                    self.disk_hits += 1
+                return frame
+            except Exception as e:
+                print(f"Error reading cached forecast: {e}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def contains(self, key: str) -> bool:
+        """Whether `key` is cached, without loading it or counting a lookup"""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, frame: pd.DataFrame):
+        """Store a frame in memory and on disk"""
+        self._remember(key, frame)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Per-process temp file and rename, so concurrent workers never read partial files
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            frame.to_pickle(tmp_path)
+            os.replace(tmp_path, self._path(key))
+            self._prune_disk()
+        except Exception as e:
+            print(f"Error writing cached forecast: {e}")
+
+    def _prune_disk(self):
+        """Delete the least recently used pickles until the cache directory fits `max_disk_bytes`"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:  # pruned by another worker meanwhile
+                        continue
+                    entries.append((info.st_mtime, info.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                self.disk_evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _remember(self, key: str, frame: pd.DataFrame):
+        with self._lock:
+            self._entries[key] = frame
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_evictions": self.disk_evictions,
+                "max_disk_bytes": self.max_disk_bytes,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "cache_dir": self.cache_dir,
+            }
+
+_cache: Optional[ForecastCache] = None
+_cache_lock = threading.Lock()
+
+def get_forecast_cache() -> ForecastCache:
+    """Get the process-wide ForecastCache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ForecastCache()
+    return _cache
@@ -7,6 +7,12 @@ import sqlite3
 import os
 from datetime import datetime, timedelta
 import random
+import sys
+
+# Allow running as a script (python utils/generate_sample_data.py) from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.job_db import ensure_schema, insert_jobs
 
 # Sample data - Expanded global locations
 LOCATIONS = [
@@ -73,25 +79,18 @@ def create_database():
     db_path = os.path.join(data_dir, "jobs.db")
     conn = sqlite3.connect(db_path)
     
-    # Create table
-    conn.execute("""
-        CREATE TABLE IF NOT EXISTS jobs (
-            id INTEGER PRIMARY KEY,
-            title TEXT,
-            company TEXT,
-            location TEXT,
-            skills TEXT,
-            description TEXT,
-            posted_date TEXT,
-            salary_min INTEGER,
-            salary_max INTEGER
-        )
+    # Recreate the normalized schema (jobs, skills, job_skills) with its indexes
+    conn.executescript("""
+        DROP TABLE IF EXISTS job_skills;
+        DROP TABLE IF EXISTS skills;
+        DROP TABLE IF EXISTS sync_state;
+        DROP TABLE IF EXISTS jobs;
     """)
+    ensure_schema(conn)
     
     # Generate and insert sample data
     jobs = generate_sample_jobs(100)
-    df = pd.DataFrame(jobs)
-    df.to_sql("jobs", conn, if_exists="replace", index=False)
+    insert_jobs(conn, pd.DataFrame(jobs))
     
     conn.close()
     print(f"Database created at {db_path}")
@@ -0,0 +1,368 @@
+"""
+Bounded-memory, chunked ingestion of job exports into incremental aggregates
+"""
+
+import os
+import copy
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from utils.data_loader import CLEAN_JOBS_CSV, get_db_connection, get_csv_watermark, get_db_max_id, iter_csv_chunks
+from utils.skill_matrix import SkillMatrix
+from utils.skill_taxonomy import get_skill_taxonomy
+from utils.phrase_extractor import PhraseCounter, MAX_PHRASES
+
+DEFAULT_CHUNK_SIZE = int(os.environ.get("M2M_CHUNK_SIZE", "50000"))
+
+def resolve_source() -> str:
+    """Which source a fresh load reads: the CSV if present, otherwise the DB"""
+    return "csv" if os.path.exists(CLEAN_JOBS_CSV) else "db"
+
+def get_watermark(source: str) -> Optional[Dict[str, Any]]:
+    """Position in a source up to which it has been ingested"""
+    if source == "csv":
+        return get_csv_watermark()
+    if source == "db":
+        return {"max_id": get_db_max_id()}
+    return None
+
+def parse_month(value: str) -> pd.Timestamp:
+    """First day of the month of a "YYYY-MM" or "YYYY-MM-DD" string; ValueError if it is neither"""
+    month = pd.to_datetime(value.strip(), errors='coerce')
+    if pd.isna(month):
+        raise ValueError(f"Invalid month '{value}', expected YYYY-MM")
+    return month.to_period('M').to_timestamp()
+
+def iter_job_chunks(chunk_size: Optional[int] = None, source: Optional[str] = None,
+                    max_id: Optional[int] = None, max_bytes: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield the job dataset in chunks of at most `chunk_size` rows, up to
+    `max_id` in the DB or the first `max_bytes` of the CSV
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    source = source or resolve_source()
+
+    if source == "csv":
+        try:
+            # Bounded by the watermark like the DB query below
+            for chunk in iter_csv_chunks(chunk_size, max_bytes):
+                yield chunk.reset_index(drop=True)
+        except Exception as e:
+            print(f"Error streaming CSV: {e}")
+        return
+
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        # Bounded by the watermark so rows inserted meanwhile arrive as the next delta
+        query, params = "SELECT * FROM jobs ORDER BY id", ()
+        if max_id is not None:
+            query, params = "SELECT * FROM jobs WHERE id <= ? ORDER BY id", (max_id,)
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_size):
+            yield chunk
+    except Exception as e:
+        print(f"Error streaming from DB: {e}")
+    finally:
+        conn.close()
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Split an in-memory frame (such as a delta) into ingestion-sized chunks"""
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+
+def _grow(matrix: Optional[sparse.csr_matrix], shape: tuple) -> sparse.csr_matrix:
+    """Resize a running count matrix to a (never smaller) new shape"""
+    if matrix is None:
+        return sparse.csr_matrix(shape, dtype=np.int64)
+    if matrix.shape != shape:
+        matrix = matrix.tocsr(copy=True)
+        matrix.resize(shape)
+    return matrix
+
+def _grow_dense(array: np.ndarray, shape: tuple) -> np.ndarray:
+    """Zero-pad a dense count array to a (never smaller) new shape"""
+    if array.shape == shape:
+        return array
+    return np.pad(array, [(0, new - old) for old, new in zip(array.shape, shape)])
+
+def _grow_vector(vector: np.ndarray, size: int) -> np.ndarray:
+    if len(vector) >= size:
+        return vector
+    return np.concatenate([vector, np.zeros(size - len(vector), dtype=vector.dtype)])
+
+class JobAggregates:
+    """
+    Running totals the analytics and forecast endpoints are served from.
+
+    Every structure here grows with the number of distinct skills,
+    locations, titles and months, never with the number of postings, so
+    ingesting an export chunk by chunk keeps peak memory bounded by the
+    chunk size. Months are stored in arrival order; `month_order` sorts
+    them chronologically.
+
+    Forecast history is kept as a dense skill x month array, so a skill's
+    history (or several skills' at once) is a row lookup. The per-location
+    history (the skill x location x month cube) is sparse: one row per
+    (location, skill) pair that occurs, keyed by `series_keys`, so it grows
+    with the pairs seen rather than with locations x skills.
+    """
+
+    def __init__(self, count_phrases: bool = False, max_phrases: int = MAX_PHRASES):
+        self.rows = 0
+        self.skill_counts = np.zeros(0, dtype=np.int64)
+        self.locations: List[str] = []
+        self.titles: List[str] = []
+        self.months: List[pd.Timestamp] = []
+        self._location_index: Dict[str, int] = {}
+        self._title_index: Dict[str, int] = {}
+        self._month_index: Dict[pd.Timestamp, int] = {}
+        self.location_counts = np.zeros(0, dtype=np.int64)
+        self.month_counts = np.zeros(0, dtype=np.int64)
+        self.location_skill_counts: Optional[sparse.csr_matrix] = None
+        self.title_skill_counts: Optional[sparse.csr_matrix] = None
+        self.skill_month_counts = np.zeros((0, 0), dtype=np.int64)
+        self.series_keys = np.zeros(0, dtype=np.int64)
+        self.series_month_counts: Optional[sparse.csr_matrix] = None
+        self.count_phrases = count_phrases
+        self.phrases: Optional[PhraseCounter] = PhraseCounter(max_phrases=max_phrases) if count_phrases else None
+
+    @property
+    def n_skills(self) -> int:
+        return len(self.skill_counts)
+
+    @property
+    def skill_names(self) -> List[str]:
+        return get_skill_taxonomy().names[:self.n_skills]
+
+    def copy(self) -> "JobAggregates":
+        """Independent copy, so a refresh can update it while readers use the original"""
+        return copy.deepcopy(self)
+
+    def month_order(self) -> np.ndarray:
+        """Month indices in chronological order"""
+        return np.argsort(np.array([m.value for m in self.months], dtype=np.int64), kind='stable')
+
+    def skill_history(self, skill_ids: List[int]) -> Tuple[List[pd.Timestamp], np.ndarray]:
+        """Chronological months and a (skills x months) array of postings mentioning each skill"""
+        order = self.month_order()
+        history = np.zeros((len(skill_ids), len(order)), dtype=np.int64)
+        for i, skill_id in enumerate(skill_ids):
+            if 0 <= skill_id < self.skill_month_counts.shape[0]:
+                history[i] = self.skill_month_counts[skill_id, order]
+        return [self.months[i] for i in order], history
+
+    @staticmethod
+    def series_key(location_ids: np.ndarray, skill_ids: np.ndarray) -> np.ndarray:
+        """Stable int64 key of (location, skill) pairs"""
+        return (np.asarray(location_ids, dtype=np.int64) << 32) | np.asarray(skill_ids, dtype=np.int64)
+
+    def location_id(self, location: str) -> Optional[int]:
+        """Code of a location name, matched exactly or else case-insensitively"""
+        code = self._location_index.get(location)
+        if code is None:
+            wanted = location.strip().lower()
+            code = next((i for i, name in enumerate(self.locations) if name.lower() == wanted), None)
+        return code
+
+    def location_series(self, skill_id: Optional[int] = None,
+                        location_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(location IDs, skill IDs) of every series in the cube, optionally for one skill or location"""
+        location_ids, skill_ids = self.series_keys >> 32, self.series_keys & 0xFFFFFFFF
+        keep = np.ones(len(self.series_keys), dtype=bool)
+        if skill_id is not None:
+            keep &= skill_ids == skill_id
+        if location_id is not None:
+            keep &= location_ids == location_id
+        return location_ids[keep], skill_ids[keep]
+
+    def location_skill_history(self, location_ids: List[int],
+                               skill_ids: List[int]) -> Tuple[List[pd.Timestamp], np.ndarray]:
+        """Chronological months and a (pairs x months) array of postings per (location, skill) pair"""
+        order = self.month_order()
+        history = np.zeros((len(skill_ids), len(order)), dtype=np.int64)
+        rows = pd.Index(self.series_keys).get_indexer(self.series_key(location_ids, skill_ids))
+        found = rows >= 0
+        if found.any() and self.series_month_counts is not None:
+            counts = _grow(self.series_month_counts, (len(self.series_keys), len(self.months)))
+            history[found] = counts[rows[found]].toarray()[:, order]
+        return [self.months[i] for i in order], history
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Fold one chunk of postings into the running totals"""
+        self.add_matrix(SkillMatrix.from_dataframe(chunk))
+        if self.phrases is not None and 'description' in chunk.columns:
+            self.phrases.update(chunk['description'])
+
+    def add_matrix(self, matrix: SkillMatrix) -> None:
+        """Fold an already built skill matrix into the running totals"""
+        n_skills = matrix.n_skills
+        self.skill_counts = _grow_vector(self.skill_counts, n_skills)
+        self.skill_counts[:n_skills] += matrix.skill_totals(include_descriptions=True)
+
+        location_codes = self._global_codes(matrix.location_codes, matrix.locations,
+                                            self.locations, self._location_index)
+        title_codes = self._global_codes(matrix.title_codes, matrix.titles,
+                                         self.titles, self._title_index)
+        month_codes = self._global_codes(matrix.month_codes, matrix.months,
+                                         self.months, self._month_index)
+
+        n_skills = max(n_skills, self.n_skills)
+        self.location_skill_counts = _grow(self.location_skill_counts, (len(self.locations), n_skills)) + \
+            _grow(matrix.group_counts(location_codes, len(self.locations)), (len(self.locations), n_skills))
+        self.title_skill_counts = _grow(self.title_skill_counts, (len(self.titles), n_skills)) + \
+            _grow(matrix.group_counts(title_codes, len(self.titles)), (len(self.titles), n_skills))
+
+        # Forecast history counts postings mentioning a skill anywhere, once per posting
+        mentioned = (matrix.combined > 0).astype(np.int32)
+        month_skills = matrix.group_counts(month_codes, len(self.months), mentioned)
+        self.skill_month_counts = _grow_dense(self.skill_month_counts, (n_skills, len(self.months)))
+        self.skill_month_counts[:month_skills.shape[1]] += month_skills.T.toarray()
+
+        # Same counts split by location, for location-scoped forecasts
+        mentions = mentioned.tocoo()
+        job_locations, job_months = location_codes[mentions.row], month_codes[mentions.row]
+        valid = (job_locations >= 0) & (job_months >= 0)
+        self._add_series_counts(job_locations[valid], mentions.col[valid].astype(np.int64),
+                                job_months[valid], mentions.data[valid])
+
+        self.location_counts = _grow_vector(self.location_counts, len(self.locations))
+        self.location_counts += np.bincount(location_codes[location_codes >= 0], minlength=len(self.locations))
+        self.month_counts = _grow_vector(self.month_counts, len(self.months))
+        self.month_counts += np.bincount(month_codes[month_codes >= 0], minlength=len(self.months))
+        self.rows += matrix.n_jobs
+
+    def add_grouped(self, rows: int, skill_totals: pd.DataFrame, location_skills: pd.DataFrame,
+                    title_skills: pd.DataFrame, month_skills: pd.DataFrame,
+                    location_totals: pd.DataFrame, month_totals: pd.DataFrame,
+                    skill_map: Dict[int, int],
+                    location_month_skills: Optional[pd.DataFrame] = None) -> None:
+        """
+        Fold counts that were already grouped elsewhere (e.g. by SQLite).
+
+        Frames hold `label`, `skill_id` and `count` columns (`skill_totals`
+        has no label, the totals frames no skill_id); month labels are
+        "YYYY-MM" strings. `location_month_skills` is labelled by location
+        and has an extra `month` column. `skill_map` translates the frames'
+        skill ids into taxonomy IDs.
+        """
+        if location_month_skills is None:
+            location_month_skills = pd.DataFrame({'label': [], 'month': [], 'skill_id': [], 'count': []})
+
+        def skill_ids(frame: pd.DataFrame) -> np.ndarray:
+            return frame['skill_id'].map(skill_map).to_numpy(dtype=np.int64)
+
+        def months(frame: pd.DataFrame, column: str = 'label') -> List[pd.Timestamp]:
+            return list(pd.to_datetime(frame[column].astype(str) + "-01", errors='coerce'))
+
+        n_skills = max([self.n_skills] + [i + 1 for i in skill_map.values()])
+        self.skill_counts = _grow_vector(self.skill_counts, n_skills)
+        np.add.at(self.skill_counts, skill_ids(skill_totals), skill_totals['count'].to_numpy(dtype=np.int64))
+
+        def codes(labels: list, names: list, index: Dict) -> np.ndarray:
+            unique = list(dict.fromkeys(labels))
+            local = {label: i for i, label in enumerate(unique)}
+            return self._global_codes(np.array([local[l] for l in labels], dtype=np.int64),
+                                      unique, names, index)
+
+        def add_counts(matrix: Optional[sparse.csr_matrix], frame: pd.DataFrame, row_codes: np.ndarray,
+                       n_rows: int) -> sparse.csr_matrix:
+            grouped = sparse.csr_matrix((frame['count'].to_numpy(dtype=np.int64), (row_codes, skill_ids(frame))),
+                                        shape=(n_rows, n_skills))
+            return _grow(matrix, (n_rows, n_skills)) + grouped
+
+        location_codes = codes(list(location_totals['label']) + list(location_skills['label']) +
+                               list(location_month_skills['label']), self.locations, self._location_index)
+        n_location_rows = len(location_totals) + len(location_skills)
+        self.location_counts = _grow_vector(self.location_counts, len(self.locations))
+        np.add.at(self.location_counts, location_codes[:len(location_totals)],
+                  location_totals['count'].to_numpy(dtype=np.int64))
+        self.location_skill_counts = add_counts(self.location_skill_counts, location_skills,
+                                                location_codes[len(location_totals):n_location_rows],
+                                                len(self.locations))
+
+        title_codes = codes(list(title_skills['label']), self.titles, self._title_index)
+        self.title_skill_counts = add_counts(self.title_skill_counts, title_skills,
+                                             title_codes, len(self.titles))
+
+        month_codes = codes(months(month_totals) + months(month_skills) +
+                            months(location_month_skills, 'month'),
+                            self.months, self._month_index)
+        n_month_rows = len(month_totals) + len(month_skills)
+        self.month_counts = _grow_vector(self.month_counts, len(self.months))
+        np.add.at(self.month_counts, month_codes[:len(month_totals)],
+                  month_totals['count'].to_numpy(dtype=np.int64))
+        self.skill_month_counts = _grow_dense(self.skill_month_counts, (n_skills, len(self.months)))
+        np.add.at(self.skill_month_counts, (skill_ids(month_skills), month_codes[len(month_totals):n_month_rows]),
+                  month_skills['count'].to_numpy(dtype=np.int64))
+        self._add_series_counts(location_codes[n_location_rows:], skill_ids(location_month_skills),
+                                month_codes[n_month_rows:], location_month_skills['count'].to_numpy(dtype=np.int64))
+        self.rows += int(rows)
+
+    def _add_series_counts(self, location_codes: np.ndarray, skill_ids: np.ndarray,
+                           month_codes: np.ndarray, counts: np.ndarray) -> None:
+        """Add counts per (location, skill, month), registering pairs not seen before as new series"""
+        keys = self.series_key(location_codes, skill_ids)
+        rows = pd.Index(self.series_keys).get_indexer(keys)
+        new = rows < 0
+        if new.any():
+            self.series_keys = np.concatenate([self.series_keys, pd.unique(keys[new])])
+            rows[new] = pd.Index(self.series_keys).get_indexer(keys[new])
+        shape = (len(self.series_keys), len(self.months))
+        # Duplicate (series, month) entries are summed by the constructor
+        added = sparse.csr_matrix((np.asarray(counts, dtype=np.int64), (rows, month_codes)), shape=shape)
+        self.series_month_counts = _grow(self.series_month_counts, shape) + added
+
+    @staticmethod
+    def _global_codes(codes: np.ndarray, labels: list, names: list, index: Dict) -> np.ndarray:
+        """Translate chunk-local category codes into the aggregate's global codes"""
+        remap = np.empty(len(labels), dtype=np.int64)
+        for i, label in enumerate(labels):
+            code = index.get(label)
+            if code is None:
+                code = index[label] = len(names)
+                names.append(label)
+            remap[i] = code
+        result = np.full(len(codes), -1, dtype=np.int64)
+        valid = codes >= 0
+        result[valid] = remap[codes[valid]]
+        return result
+
+def ingest(chunk_size: Optional[int] = None, count_phrases: bool = True,
+           source: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Stream the dataset through JobAggregates without holding it in memory.
+
+    Returns the aggregates, the source and watermark they cover, and a
+    throughput report (rows, chunks, seconds and rows/sec) for sizing
+    hardware.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    source = source or resolve_source()
+    watermark = get_watermark(source)
+    aggregates = JobAggregates(count_phrases=count_phrases)
+    chunks = 0
+    start = time.perf_counter()
+    max_id = watermark.get("max_id") if source == "db" and watermark else None
+    max_bytes = watermark.get("size") if source == "csv" and watermark else None
+    for chunk in iter_job_chunks(chunk_size, source, max_id, max_bytes):
+        aggregates.update(chunk)
+        chunks += 1
+    seconds = time.perf_counter() - start
+    report = {
+        "source": source,
+        "rows": aggregates.rows,
+        "chunks": chunks,
+        "chunk_size": chunk_size,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(aggregates.rows / seconds, 1) if seconds > 0 else 0.0,
+    }
+    print(f"Ingested {report['rows']} jobs from {source} in {report['chunks']} chunks "
+          f"({report['rows_per_sec']} rows/sec)")
+    return {"aggregates": aggregates, "source": source, "watermark": watermark, "report": report}
+
+if __name__ == "__main__":
+    print(ingest()["report"])
@@ -0,0 +1,243 @@
+"""
+Normalized, indexed SQLite schema for job postings and SQL pushdown queries
+"""
+
+import sqlite3
+import pandas as pd
+from typing import List, Dict, Any, Optional, Tuple
+from utils.data_loader import get_db_connection
+from utils.ingest import JobAggregates, DEFAULT_CHUNK_SIZE
+from utils.skill_matrix import SkillMatrix
+from utils.skill_taxonomy import get_skill_taxonomy
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    company TEXT,
+    location TEXT,
+    skills TEXT,
+    description TEXT,
+    posted_date TEXT,
+    salary_min INTEGER,
+    salary_max INTEGER
+);
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS job_skills (
+    job_id INTEGER NOT NULL,
+    skill_id INTEGER NOT NULL,
+    listed INTEGER NOT NULL DEFAULT 0,
+    described INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, skill_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills (skill_id, job_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_posted_date ON jobs (posted_date);
+CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs (location);
+CREATE INDEX IF NOT EXISTS idx_jobs_title ON jobs (title);
+"""
+
+# Rows whose posted_date does not start with a YYYY-MM month are left out of monthly counts
+_HAS_MONTH = "posted_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'"
+
+JOB_COLUMNS = ["id", "title", "company", "location", "skills", "description",
+               "posted_date", "salary_min", "salary_max"]
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create missing tables and indexes, and index skills of jobs not yet in job_skills"""
+    conn.executescript(SCHEMA)
+    # Tables written by older versions (pandas to_sql) have no primary key on id
+    pk_columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)") if row[5]]
+    if pk_columns != ["id"]:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_id ON jobs (id)")
+    conn.commit()
+    sync_job_skills(conn)
+
+def _skill_db_ids(conn: sqlite3.Connection, names: List[str]) -> Dict[str, int]:
+    """DB ids for canonical skill names, inserting unknown names"""
+    conn.executemany("INSERT OR IGNORE INTO skills (name) VALUES (?)", [(n,) for n in names])
+    ids: Dict[str, int] = {}
+    for start in range(0, len(names), 500):
+        batch = names[start:start + 500]
+        placeholders = ",".join("?" * len(batch))
+        ids.update(conn.execute(f"SELECT name, id FROM skills WHERE name IN ({placeholders})", batch))
+    return ids
+
+def _job_skill_rows(chunk: pd.DataFrame, conn: sqlite3.Connection) -> List[Tuple[int, int, int, int]]:
+    """(job_id, skill_id, listed, described) rows for a chunk of jobs"""
+    matrix = SkillMatrix.from_dataframe(chunk.reset_index(drop=True))
+    listed = matrix.skills.tocoo()
+    described = matrix.description_skills.tocoo()
+    pairs: Dict[Tuple[int, int], List[int]] = {}
+    for row, col, value in zip(listed.row, listed.col, listed.data):
+        pairs.setdefault((row, col), [0, 0])[0] += int(value)
+    for row, col in zip(described.row, described.col):
+        pairs.setdefault((row, col), [0, 0])[1] = 1
+
+    names = sorted({matrix.skill_names[col] for _, col in pairs})
+    db_ids = _skill_db_ids(conn, names)
+    job_ids = chunk['id'].to_numpy()
+    return [(int(job_ids[row]), db_ids[matrix.skill_names[col]], counts[0], counts[1])
+            for (row, col), counts in pairs.items()]
+
+def sync_job_skills(conn: sqlite3.Connection, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Fill job_skills for jobs added since the last sync; returns how many jobs were indexed"""
+    row = conn.execute("SELECT value FROM sync_state WHERE key = 'job_skills_max_id'").fetchone()
+    last_id = row[0] if row else 0
+    indexed = 0
+    for chunk in pd.read_sql_query("SELECT id, skills, description FROM jobs WHERE id > ? ORDER BY id",
+                                   conn, params=(last_id,), chunksize=chunk_size):
+        if chunk.empty:
+            continue
+        rows = _job_skill_rows(chunk, conn)
+        conn.executemany("INSERT OR REPLACE INTO job_skills (job_id, skill_id, listed, described) "
+                         "VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('job_skills_max_id', ?)",
+                     (int(chunk['id'].max()),))
+        conn.commit()
+        indexed += len(chunk)
+    return indexed
+
+def insert_jobs(conn: sqlite3.Connection, df: pd.DataFrame) -> None:
+    """Insert job postings and index their skills"""
+    columns = [c for c in JOB_COLUMNS if c in df.columns]
+    placeholders = ",".join("?" * len(columns))
+    conn.executemany(f"INSERT OR REPLACE INTO jobs ({','.join(columns)}) VALUES ({placeholders})",
+                     df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None))
+    conn.commit()
+    sync_job_skills(conn)
+
+def _id_filter(after_id: Optional[int], up_to_id: Optional[int]) -> Tuple[str, tuple]:
+    clauses, params = ["1 = 1"], []
+    if after_id is not None:
+        clauses.append("j.id > ?")
+        params.append(after_id)
+    if up_to_id is not None:
+        clauses.append("j.id <= ?")
+        params.append(up_to_id)
+    return " AND ".join(clauses), tuple(params)
+
+def _taxonomy_skill_map(conn: sqlite3.Connection) -> Dict[int, int]:
+    """DB skill ids (local to the file) mapped to this process's canonical skill IDs"""
+    taxonomy = get_skill_taxonomy()
+    return {db_id: taxonomy.intern(name) for db_id, name in conn.execute("SELECT id, name FROM skills")}
+
+def aggregate_into(aggregates: JobAggregates, conn: sqlite3.Connection,
+                   after_id: Optional[int] = None, up_to_id: Optional[int] = None) -> JobAggregates:
+    """
+    Add jobs with `after_id` < id <= `up_to_id` (unbounded where None) to
+    `aggregates` using GROUP BY queries, so no posting rows are
+    materialized in Python.
+    """
+    where, params = _id_filter(after_id, up_to_id)
+    skill_map = _taxonomy_skill_map(conn)
+
+    def grouped(query: str) -> pd.DataFrame:
+        return pd.read_sql_query(query, conn, params=params)
+
+    aggregates.add_grouped(
+        rows=conn.execute(f"SELECT COUNT(*) FROM jobs j WHERE {where}", params).fetchone()[0],
+        skill_totals=grouped(f"""
+            SELECT s.skill_id, SUM(s.listed + s.described) AS count
+            FROM job_skills s JOIN jobs j ON j.id = s.job_id
+            WHERE {where} GROUP BY s.skill_id"""),
+        location_skills=grouped(f"""
+            SELECT j.location AS label, s.skill_id, SUM(s.listed) AS count
+            FROM job_skills s JOIN jobs j ON j.id = s.job_id
+            WHERE {where} AND s.listed > 0 AND j.location IS NOT NULL
+            GROUP BY j.location, s.skill_id ORDER BY MIN(j.id)"""),
+        title_skills=grouped(f"""
+            SELECT j.title AS label, s.skill_id, SUM(s.listed) AS count
+            FROM job_skills s JOIN jobs j ON j.id = s.job_id
+            WHERE {where} AND s.listed > 0 AND j.title IS NOT NULL
+            GROUP BY j.title, s.skill_id ORDER BY MIN(j.id)"""),
+        month_skills=grouped(f"""
+            SELECT substr(j.posted_date, 1, 7) AS label, s.skill_id, COUNT(*) AS count
+            FROM job_skills s JOIN jobs j ON j.id = s.job_id
+            WHERE {where} AND j.{_HAS_MONTH}
+            GROUP BY label, s.skill_id"""),
+        location_totals=grouped(f"""
+            SELECT location AS label, COUNT(*) AS count FROM jobs j
+            WHERE {where} AND location IS NOT NULL GROUP BY location ORDER BY MIN(j.id)"""),
+        month_totals=grouped(f"""
+            SELECT substr(posted_date, 1, 7) AS label, COUNT(*) AS count FROM jobs j
+            WHERE {where} AND j.{_HAS_MONTH} GROUP BY label"""),
+        skill_map=skill_map,
+        location_month_skills=grouped(f"""
+            SELECT j.location AS label, substr(j.posted_date, 1, 7) AS month, s.skill_id, COUNT(*) AS count
+            FROM job_skills s JOIN jobs j ON j.id = s.job_id
+            WHERE {where} AND j.location IS NOT NULL AND j.{_HAS_MONTH}
+            GROUP BY j.location, month, s.skill_id ORDER BY MIN(j.id)"""),
+    )
+    return aggregates
+
+def load_aggregates(conn: sqlite3.Connection) -> Tuple[JobAggregates, Optional[int]]:
+    """Aggregates for the whole table and the max job id they cover"""
+    ensure_schema(conn)
+    max_id = conn.execute("SELECT MAX(id) FROM jobs").fetchone()[0]
+    return aggregate_into(JobAggregates(), conn, up_to_id=max_id), max_id
+
+def _request_filter(location: Optional[str], since: Optional[str],
+                    up_to_id: Optional[int]) -> Tuple[str, List[Any]]:
+    """WHERE clause for request-time filters, served by the location and posted_date indexes"""
+    clauses, params = ["1 = 1"], []
+    if up_to_id is not None:
+        clauses.append("j.id <= ?")
+        params.append(up_to_id)
+    if location is not None:
+        clauses.append("j.location = ?")
+        params.append(location)
+    if since is not None:
+        clauses.append("j.posted_date >= ?")
+        params.append(since)
+    return " AND ".join(clauses), params
+
+def query_skill_totals(conn: sqlite3.Connection, location: Optional[str] = None, since: Optional[str] = None,
+                       up_to_id: Optional[int] = None) -> pd.Series:
+    """
+    Mentions per canonical skill ID (skills column plus descriptions, as
+    JobAggregates.skill_counts counts them) in one location and/or from
+    `since` ("YYYY-MM-DD") on
+    """
+    where, params = _request_filter(location, since, up_to_id)
+    totals = pd.read_sql_query(f"""
+        SELECT s.skill_id, SUM(s.listed + s.described) AS count
+        FROM job_skills s JOIN jobs j ON j.id = s.job_id
+        WHERE {where} GROUP BY s.skill_id""", conn, params=params)
+    totals['skill_id'] = totals['skill_id'].map(_taxonomy_skill_map(conn))
+    return totals.groupby('skill_id')['count'].sum()
+
+def query_skill_history(conn: sqlite3.Connection, skill_ids: List[int], location: Optional[str] = None,
+                        since: Optional[str] = None, up_to_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    Postings per month mentioning each canonical skill ID in `skill_ids`, in
+    one location and/or from `since` on, as `skill_id`, `month` ("YYYY-MM")
+    and `count` columns
+    """
+    skill_map, wanted = _taxonomy_skill_map(conn), set(skill_ids)
+    db_ids = [db_id for db_id, skill_id in skill_map.items() if skill_id in wanted]
+    if not db_ids:
+        return pd.DataFrame({'skill_id': [], 'month': [], 'count': []})
+    where, params = _request_filter(location, since, up_to_id)
+    history = pd.read_sql_query(f"""
+        SELECT s.skill_id, substr(j.posted_date, 1, 7) AS month, COUNT(*) AS count
+        FROM job_skills s JOIN jobs j ON j.id = s.job_id
+        WHERE s.skill_id IN ({",".join("?" * len(db_ids))}) AND {where} AND j.{_HAS_MONTH}
+        GROUP BY s.skill_id, month""", conn, params=db_ids + params)
+    history['skill_id'] = history['skill_id'].map(skill_map)
+    return history.groupby(['skill_id', 'month'], as_index=False)['count'].sum()
+
+if __name__ == "__main__":
+    connection = get_db_connection()
+    if connection is None:
+        print("No jobs database found")
+    else:
+        ensure_schema(connection)
+        print(f"Schema ready: {connection.execute('SELECT COUNT(*) FROM job_skills').fetchone()[0]} job skills indexed")
+        connection.close()
@@ -0,0 +1,368 @@
+"""
+Process-wide job data store shared by all services
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+import pandas as pd
+from typing import Dict, Any, Optional, Callable, Tuple, List
+from utils.data_loader import (
+    load_all_jobs, load_skill_pairs, get_csv_watermark, load_csv_appended,
+    get_db_max_id, load_jobs_from_db_after, get_db_connection
+)
+from utils import job_db
+from utils.skill_matrix import SkillMatrix
+from utils.ingest import JobAggregates, ingest, iter_frame_chunks
+
+# "memory" keeps every posting in a DataFrame; "stream" ingests in chunks and
+# keeps only the aggregates, for exports that do not fit in RAM; "sqlite"
+# computes the aggregates with indexed GROUP BY queries inside jobs.db
+INGEST_MODE = os.environ.get("M2M_INGEST_MODE", "memory")
+
+# Seconds between checks for new postings (0 disables the watcher)
+RELOAD_INTERVAL = float(os.environ.get("M2M_RELOAD_INTERVAL", "30"))
+
+class JobData:
+    """
+    One immutable version of the dataset.
+
+    A refresh builds a new JobData next to the current one and swaps the
+    store's reference in a single assignment, so readers always see a
+    complete version and never a half-applied delta.
+    """
+
+    def __init__(self, version: int, source: str, jobs_df: pd.DataFrame,
+                 skill_matrix: Optional[SkillMatrix], aggregates: JobAggregates,
+                 watermark: Optional[Dict[str, Any]]):
+        self.version = version
+        self.source = source
+        self.jobs_df = jobs_df
+        self.skill_matrix = skill_matrix
+        self.aggregates = aggregates
+        self.watermark = watermark
+        self.loaded_at = time.time()
+        self.memory_bytes = int(jobs_df.memory_usage(deep=True).sum()) if not jobs_df.empty else 0
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Identifies the data this version covers across processes (the
+        version number restarts at 1 in every process)
+        """
+        payload = json.dumps([self.source, self.watermark, self.aggregates.rows], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+class JobStore:
+    """Loads the job dataset once per process, exposes read-only views and refreshes in place"""
+
+    def __init__(self, loader: Callable[[Optional[int]], Tuple[pd.DataFrame, str]] = load_all_jobs,
+                 mode: str = INGEST_MODE):
+        self._loader = loader
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._data: Optional[JobData] = None
+        self._listeners: List[Callable[[JobData], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watcher = threading.Event()
+        self.ingest_report: Optional[Dict[str, Any]] = None
+        self.last_refresh: Optional[Dict[str, Any]] = None
+        self.load_seconds = 0.0
+        self.matrix_seconds = 0.0
+
+    @property
+    def data(self) -> JobData:
+        """Current dataset version; hold on to it for reads that must be consistent"""
+        self._ensure_loaded()
+        return self._data
+
+    @property
+    def version(self) -> int:
+        return self.data.version
+
+    @property
+    def source(self) -> str:
+        return self.data.source
+
+    @property
+    def jobs_df(self) -> pd.DataFrame:
+        """Shared jobs DataFrame. Callers must treat it as read-only."""
+        return self.data.jobs_df
+
+    @property
+    def skill_matrix(self) -> SkillMatrix:
+        """Job x skill incidence matrix (empty in stream mode)"""
+        matrix = self.data.skill_matrix
+        return matrix if matrix is not None else SkillMatrix.from_dataframe(pd.DataFrame())
+
+    @property
+    def aggregates(self) -> JobAggregates:
+        """Skill, location, title and month totals that analytics and forecasts read"""
+        return self.data.aggregates
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._data is not None
+
+    def sql_pushdown(self, data: JobData) -> bool:
+        """Whether request-time filters over `data` run as indexed queries against jobs.db"""
+        return self.mode == "sqlite" and data.source == "db"
+
+    def add_listener(self, callback: Callable[[JobData], None]):
+        """Call `callback` with each new version after it is swapped in"""
+        self._listeners.append(callback)
+
+    def stats(self) -> Dict[str, Any]:
+        """Report load time and memory footprint of the shared dataset"""
+        data = self.data
+        matrix = data.skill_matrix
+        return {
+            "mode": self.mode,
+            "source": data.source,
+            "version": data.version,
+            "rows": data.aggregates.rows,
+            "columns": list(data.jobs_df.columns),
+            "load_seconds": round(self.load_seconds, 4),
+            "matrix_seconds": round(self.matrix_seconds, 4),
+            "skills": matrix.n_skills if matrix is not None else None,
+            "matrix_nnz": int(matrix.skills.nnz + matrix.description_skills.nnz) if matrix is not None else None,
+            "memory_bytes": data.memory_bytes,
+            "memory_mb": round(data.memory_bytes / (1024 * 1024), 2),
+            "ingest": self.ingest_report,
+            "last_refresh": self.last_refresh
+        }
+
+    def _ensure_loaded(self):
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load(version=1)
+
+    def _load(self, version: int) -> JobData:
+        """Load the full dataset and record how long it took and how much memory it holds"""
+        if self.mode == "stream":
+            return self._load_streaming(version)
+        if self.mode == "sqlite":
+            return self._load_sqlite(version)
+
+        start = time.perf_counter()
+        # The CSV is read only up to the watermark, so rows appended meanwhile arrive as the next delta
+        csv_watermark = get_csv_watermark()
+        df, source = self._loader(csv_watermark["size"] if csv_watermark else None)
+        self.load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matrix = SkillMatrix.from_dataframe(df, load_skill_pairs(source, len(df)))
+        aggregates = JobAggregates()
+        aggregates.add_matrix(matrix)
+        self.matrix_seconds = time.perf_counter() - start
+
+        data = JobData(version, source, df, matrix, aggregates,
+                       self._initial_watermark(source, df, csv_watermark))
+        print(f"JobStore loaded {len(df)} jobs from {source} in {self.load_seconds:.3f}s "
+              f"({data.memory_bytes / (1024 * 1024):.2f} MB)")
+        return data
+
+    def _load_streaming(self, version: int) -> JobData:
+        """Ingest in bounded chunks, keeping only aggregates (no per-posting rows)"""
+        start = time.perf_counter()
+        result = ingest()
+        self.load_seconds = time.perf_counter() - start
+        self.ingest_report = result["report"]
+        return JobData(version, result["source"], pd.DataFrame(), None,
+                       result["aggregates"], result["watermark"])
+
+    def _load_sqlite(self, version: int) -> JobData:
+        """Aggregate inside SQLite, pulling only grouped counts into Python"""
+        start = time.perf_counter()
+        conn = get_db_connection()
+        if conn is None:
+            print("JobStore: no jobs database found for sqlite mode")
+            return JobData(version, "none", pd.DataFrame(), None, JobAggregates(), None)
+        try:
+            aggregates, max_id = job_db.load_aggregates(conn)
+        finally:
+            conn.close()
+        self.load_seconds = time.perf_counter() - start
+        print(f"JobStore aggregated {aggregates.rows} jobs in SQLite in {self.load_seconds:.3f}s")
+        return JobData(version, "db", pd.DataFrame(), None, aggregates,
+                       {"max_id": max_id} if max_id is not None else None)
+
+    @staticmethod
+    def _initial_watermark(source: str, df: pd.DataFrame,
+                           csv_watermark: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if source == "csv":
+            return csv_watermark
+        if source == "db" and 'id' in df.columns and not df.empty:
+            return {"max_id": int(df['id'].max())}
+        return None
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Pick up postings added since the current version and swap in a new one.
+
+        Rows appended to the CSV, or inserted into the jobs table with a
+        higher id, are ingested as a delta on top of the current version. A
+        CSV that was rewritten rather than appended to is reloaded in full.
+        """
+        self._ensure_loaded()
+        with self._refresh_lock:
+            # Read under the lock so a concurrent refresh cannot apply the same delta twice
+            current = self._data
+            start = time.perf_counter()
+            kind, delta, watermark = self._read_delta(current)
+            if kind == "none":
+                return {"changed": False, "version": current.version}
+
+            if kind == "full":
+                data = self._load(version=current.version + 1)
+            else:
+                data = self._apply_delta(current, delta, watermark)
+
+            # Single reference assignment: readers see either the old or the new version
+            self._data = data
+            self.last_refresh = {
+                "changed": True,
+                "kind": kind,
+                "rows_added": data.aggregates.rows - current.aggregates.rows,
+                "version": data.version,
+                "seconds": round(time.perf_counter() - start, 4),
+            }
+            print(f"JobStore refreshed ({kind}): {self.last_refresh['rows_added']} new jobs, "
+                  f"version {data.version}")
+
+        for callback in self._listeners:
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"Error in job data listener: {e}")
+        return self.last_refresh
+
+    def _read_delta(self, current: JobData) -> Tuple[str, Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+        """Classify what changed since `current`: "none", "delta" (with its rows) or "full" """
+        watermark = current.watermark
+
+        if current.source == "csv":
+            latest = get_csv_watermark()
+            if latest is None:
+                return "full", None, None
+            if watermark and latest["size"] == watermark["size"] and latest["mtime_ns"] == watermark["mtime_ns"]:
+                return "none", None, None
+            appended = load_csv_appended(watermark) if watermark else None
+            if appended is None:
+                return "full", None, None
+            delta, latest = appended
+            return ("delta" if not delta.empty else "none"), delta, latest
+
+        if current.source == "db":
+            max_id = get_db_max_id()
+            last_id = watermark.get("max_id") if watermark else None
+            if max_id is None or (last_id is not None and max_id <= last_id):
+                return "none", None, None
+            if last_id is None:
+                return "full", None, None
+            if self.mode == "sqlite":
+                # Aggregated in SQLite by id range; no rows are read here
+                return "delta", None, {"max_id": max_id}
+            delta = load_jobs_from_db_after(last_id)
+            if delta.empty:
+                return "none", None, None
+            return "delta", delta, {"max_id": int(delta['id'].max())}
+
+        # Nothing was loaded before: reload once data shows up
+        if get_csv_watermark() is not None or get_db_max_id() is not None:
+            return "full", None, None
+        return "none", None, None
+
+    def _apply_delta(self, current: JobData, delta: Optional[pd.DataFrame],
+                     watermark: Optional[Dict[str, Any]]) -> JobData:
+        """Build the next version from the current one plus the new rows"""
+        aggregates = current.aggregates.copy()
+
+        if self.mode == "sqlite":
+            conn = get_db_connection()
+            try:
+                job_db.sync_job_skills(conn)
+                job_db.aggregate_into(aggregates, conn, after_id=current.watermark["max_id"],
+                                      up_to_id=watermark["max_id"])
+            finally:
+                conn.close()
+            return JobData(current.version + 1, current.source, current.jobs_df, None,
+                           aggregates, watermark)
+
+        if self.mode == "stream":
+            for chunk in iter_frame_chunks(delta):
+                aggregates.update(chunk)
+            return JobData(current.version + 1, current.source, current.jobs_df, None,
+                           aggregates, watermark)
+
+        delta = delta.reset_index(drop=True)
+        if 'posted_date' in delta.columns and 'posted_date' in current.jobs_df.columns \
+                and pd.api.types.is_datetime64_any_dtype(current.jobs_df['posted_date']):
+            delta['posted_date'] = pd.to_datetime(delta['posted_date'], errors='coerce')
+        delta_matrix = SkillMatrix.from_dataframe(delta)
+        aggregates.add_matrix(delta_matrix)
+        matrix = current.skill_matrix.append(delta_matrix)
+        jobs_df = self._concat_jobs(current.jobs_df, delta)
+        return JobData(current.version + 1, current.source, jobs_df, matrix, aggregates, watermark)
+
+    @staticmethod
+    def _concat_jobs(jobs_df: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """
+        Append `delta` to `jobs_df` keeping its column dtypes.
+
+        A plain concat would turn the snapshot's Arrow-backed and categorical
+        columns into object columns after the first reload. Arrow-backed
+        columns are concatenated as chunks, so the loaded rows keep pointing
+        into the memory-mapped snapshot.
+        """
+        if jobs_df.empty:
+            return delta
+        base, delta = jobs_df.copy(deep=False), delta.copy()
+        for column, dtype in jobs_df.dtypes.items():
+            if column not in delta.columns:
+                continue
+            try:
+                if isinstance(dtype, pd.CategoricalDtype):
+                    categories = dtype.categories.union(pd.Index(delta[column].dropna().unique()), sort=False)
+                    base[column] = base[column].cat.set_categories(categories)
+                    delta[column] = pd.Categorical(delta[column], categories=categories)
+                else:
+                    delta[column] = delta[column].astype(dtype)
+            except Exception as e:
+                print(f"Error matching dtype of new '{column}' values: {e}")
+        return pd.concat([base, delta], ignore_index=True)
+
+    def start_watcher(self, interval: float = RELOAD_INTERVAL):
+        """Poll for new postings every `interval` seconds on a daemon thread"""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop_watcher.clear()
+
+        def watch():
+            while not self._stop_watcher.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing job data: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="job-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_watcher.set()
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    """Get the process-wide JobStore, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore()
+    return _store
@@ -0,0 +1,146 @@
+"""
+Clustering of phrase embeddings for emerging skill detection
+"""
+
+import os
+import numpy as np
+from typing import Optional
+
+# scikit-learn takes about a second to import, so it is imported where it is used
+
+# "kmeans" (exhaustive, small inputs), "minibatch" (mini-batch k-means) or "density" (HDBSCAN)
+CLUSTERING_METHODS = ("kmeans", "minibatch", "density")
+CLUSTERING_METHOD = os.environ.get("M2M_CLUSTERING", "minibatch")
+
+# Embeddings per mini-batch k-means step
+MINIBATCH_SIZE = int(os.environ.get("M2M_MINIBATCH_SIZE", "2048"))
+
+# Mini-batch k-means runs on embeddings PCA-reduced to this many dimensions
+MINIBATCH_DIMENSIONS = int(os.environ.get("M2M_MINIBATCH_DIMENSIONS", "64"))
+
+# Embeddings scored when choosing the cluster count automatically
+AUTO_K_SAMPLE = int(os.environ.get("M2M_AUTO_K_SAMPLE", "4000"))
+AUTO_K_CANDIDATES = 8
+
+# Density clustering runs on PCA-reduced embeddings, fitted on at most this many of them
+DENSITY_DIMENSIONS = int(os.environ.get("M2M_DENSITY_DIMENSIONS", "16"))
+DENSITY_SAMPLE = int(os.environ.get("M2M_DENSITY_SAMPLE", "10000"))
+
+# Embeddings assigned to centroids per block, bounding the distance matrix
+ASSIGN_BLOCK = 8192
+
+RANDOM_STATE = 42
+
+def cluster_embeddings(embeddings: np.ndarray, method: str = CLUSTERING_METHOD, min_cluster_size: int = 3,
+                       n_clusters: Optional[int] = None) -> np.ndarray:
+    """
+    Cluster label of each embedding, -1 for noise.
+
+    The k-means methods use `n_clusters` clusters; when it is None,
+    "kmeans" keeps the historical min(10, n // min_cluster_size) and
+    "minibatch" picks the count with the best silhouette score. The
+    "density" method finds its own clusters and leaves outliers as noise.
+    """
+    if method not in CLUSTERING_METHODS:
+        raise ValueError(f"Unknown clustering method '{method}', expected one of {', '.join(CLUSTERING_METHODS)}")
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = len(embeddings)
+    if n < max(min_cluster_size, 2):
+        return np.full(n, -1, dtype=np.int64)
+
+    if method == "density":
+        return _density_labels(embeddings, min_cluster_size)
+
+    from sklearn.cluster import KMeans, MiniBatchKMeans
+    if method == "kmeans":
+        if n_clusters is None:
+            n_clusters = max(2, min(10, n // min_cluster_size))
+        model = KMeans(n_clusters=min(n_clusters, n), random_state=RANDOM_STATE, n_init=10)
+        return model.fit_predict(embeddings).astype(np.int64)
+
+    reduced = _reduce(_normalize(embeddings), MINIBATCH_DIMENSIONS)
+    if n_clusters is None:
+        n_clusters = _auto_cluster_count(reduced, min_cluster_size)
+    model = MiniBatchKMeans(n_clusters=min(n_clusters, n), batch_size=MINIBATCH_SIZE, n_init=1,
+                            random_state=RANDOM_STATE)
+    return model.fit_predict(reduced).astype(np.int64)
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    """Unit-length rows, so euclidean distances rank pairs like cosine similarity"""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+def _reduce(embeddings: np.ndarray, dimensions: int) -> np.ndarray:
+    """Embeddings projected onto their top `dimensions` principal components, if they have more"""
+    n, dim = embeddings.shape
+    if dim <= dimensions or n <= dimensions:
+        return embeddings
+    from sklearn.decomposition import PCA
+    return PCA(n_components=dimensions, random_state=RANDOM_STATE).fit_transform(embeddings)
+
+def _auto_cluster_count(embeddings: np.ndarray, min_cluster_size: int) -> int:
+    """Cluster count with the best silhouette score over a geometric grid, scored on a sample"""
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.metrics import silhouette_score
+    n = len(embeddings)
+    rng = np.random.default_rng(RANDOM_STATE)
+    sample = embeddings[rng.choice(n, AUTO_K_SAMPLE, replace=False)] if n > AUTO_K_SAMPLE else embeddings
+    largest = max(2, min(n // min_cluster_size, len(sample) - 1, 4 * int(np.sqrt(n))))
+    grid = np.unique(np.geomspace(2, largest, AUTO_K_CANDIDATES).round().astype(int))
+
+    best_k, best_score = int(grid[0]), -np.inf
+    for k in grid:
+        labels = MiniBatchKMeans(n_clusters=int(k), batch_size=MINIBATCH_SIZE, n_init=1,
+                                 random_state=RANDOM_STATE).fit_predict(sample)
+        if len(np.unique(labels)) < 2:
+            continue
+        score = silhouette_score(sample, labels, random_state=RANDOM_STATE)
+        if score > best_score:
+            best_k, best_score = int(k), score
+    return best_k
+
+def _density_labels(embeddings: np.ndarray, min_cluster_size: int) -> np.ndarray:
+    """
+    HDBSCAN labels on PCA-reduced embeddings.
+
+    HDBSCAN grows super-linearly, so beyond DENSITY_SAMPLE embeddings it
+    is fitted on a random sample and every other embedding joins the
+    nearest cluster centroid, or stays noise if it lies farther from it
+    than any sampled member of that cluster.
+    """
+    from sklearn.cluster import HDBSCAN
+    n = len(embeddings)
+    reduced = _reduce(_normalize(embeddings), DENSITY_DIMENSIONS)
+
+    fit_rows = np.arange(n)
+    if n > DENSITY_SAMPLE:
+        fit_rows = np.sort(np.random.default_rng(RANDOM_STATE).choice(n, DENSITY_SAMPLE, replace=False))
+    model = HDBSCAN(min_cluster_size=min_cluster_size, copy=False)
+    fit_labels = model.fit_predict(reduced[fit_rows]).astype(np.int64)
+    if len(fit_rows) == n:
+        return fit_labels
+
+    labels = np.full(n, -1, dtype=np.int64)
+    labels[fit_rows] = fit_labels
+    clustered = fit_labels >= 0
+    if not clustered.any():
+        return labels
+    n_found = fit_labels.max() + 1
+    members = reduced[fit_rows][clustered]
+    member_labels = fit_labels[clustered]
+    centroids = np.zeros((n_found, reduced.shape[1]))
+    np.add.at(centroids, member_labels, members)
+    centroids /= np.bincount(member_labels, minlength=n_found)[:, None]
+    radius = np.zeros(n_found)
+    np.maximum.at(radius, member_labels, np.linalg.norm(members - centroids[member_labels], axis=1))
+
+    rest = np.setdiff1d(np.arange(n), fit_rows, assume_unique=True)
+    centroid_norms = np.square(centroids).sum(axis=1)
+    for start in range(0, len(rest), ASSIGN_BLOCK):
+        rows = rest[start:start + ASSIGN_BLOCK]
+        points = reduced[rows]
+        distances = np.square(points).sum(axis=1)[:, None] - 2 * points @ centroids.T + centroid_norms[None, :]
+        nearest = distances.argmin(axis=1)
+        nearest_distance = np.sqrt(np.maximum(distances[np.arange(len(rows)), nearest], 0))
+        labels[rows] = np.where(nearest_distance <= radius[nearest], nearest, -1)
+    return labels
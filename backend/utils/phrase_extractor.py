@@ -0,0 +1,215 @@
+"""
+Streaming n-gram extraction with hashed document-frequency counting
+"""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Shortest and longest phrases counted, in words
+NGRAM_RANGE = (2, 3)
+
+# Phrases must appear in at least this many postings to be kept
+PHRASE_MIN_DF = int(os.environ.get("M2M_PHRASE_MIN_DF", "2"))
+
+# Counters per sketch row; memory is depth x width x 4 bytes whatever the corpus size
+PHRASE_SKETCH_WIDTH = int(os.environ.get("M2M_PHRASE_SKETCH_WIDTH", str(2 ** 20)))
+PHRASE_SKETCH_DEPTH = 2
+
+# Upper bound on candidate phrases kept with their text between chunks
+MAX_PHRASES = int(os.environ.get("M2M_MAX_PHRASES", "200000"))
+
+_TOKEN_PATTERN = re.compile(r'\b[a-z][a-z0-9]+\b')
+
+# Words that carry no skill meaning at either end of a phrase in a job posting
+POSTING_STOP_WORDS = frozenset("""
+    ability able applicants apply benefits candidate candidates company competitive culture day
+    degree environment equal excellent experience experienced familiarity following good great
+    help ideal including join knowledge looking member members new opportunity plus position
+    preferred proven related required requirements responsibilities role salary skills solid
+    strong team teams understanding using work working world year years
+""".split())
+
+_stop_words: Optional[frozenset] = None
+
+def default_stop_words() -> frozenset:
+    """English stop words plus POSTING_STOP_WORDS (scikit-learn is only imported on first use)"""
+    global _stop_words
+    if _stop_words is None:
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        _stop_words = frozenset(ENGLISH_STOP_WORDS) | POSTING_STOP_WORDS
+    return _stop_words
+
+def document_ngrams(text: str, ngram_range: Tuple[int, int] = NGRAM_RANGE,
+                    stop_words: Optional[frozenset] = None) -> set:
+    """Distinct n-grams of one text that neither start nor end with a stop word"""
+    stop_words = default_stop_words() if stop_words is None else stop_words
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    edge = [token not in stop_words for token in tokens]
+    grams = set()
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        grams.update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)
+                     if edge[i] and edge[i + n - 1])
+    return grams
+
+class PhraseCounter:
+    """
+    Document frequencies of bigrams and trigrams over a stream of texts.
+
+    Counts go into a count-min sketch (a few rows of hashed counters), so
+    memory is fixed however many postings and distinct phrases stream
+    through, and a phrase's frequency is never under-counted. Only phrases
+    that reach `min_df` keep their text, in a candidate table pruned to
+    the most frequent `max_phrases`; a pruned phrase comes back with its
+    full count if it appears again, since the sketch never forgets.
+    """
+
+    def __init__(self, min_df: int = PHRASE_MIN_DF, max_phrases: int = MAX_PHRASES,
+                 ngram_range: Tuple[int, int] = NGRAM_RANGE, width: int = PHRASE_SKETCH_WIDTH,
+                 depth: int = PHRASE_SKETCH_DEPTH, stop_words: Optional[frozenset] = None):
+        self.min_df = max(min_df, 1)
+        self.max_phrases = max_phrases
+        self.ngram_range = ngram_range
+        self.stop_words = default_stop_words() if stop_words is None else stop_words
+        self.width = width
+        self.sketch = np.zeros((depth, width), dtype=np.uint32)
+        self.candidates: Dict[str, int] = {}
+        self.documents = 0
+
+    def _buckets(self, phrases: np.ndarray) -> np.ndarray:
+        """(depth x phrases) counter positions, derived from one 64-bit hash by double hashing"""
+        hashed = pd.util.hash_array(phrases, categorize=False)
+        low, high = hashed & np.uint64(0xFFFFFFFF), hashed >> np.uint64(32)
+        rows = np.arange(self.sketch.shape[0], dtype=np.uint64)[:, None]
+        return ((low[None, :] + rows * high[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def _estimate(self, buckets: np.ndarray) -> np.ndarray:
+        return np.take_along_axis(self.sketch, buckets, axis=1).min(axis=0).astype(np.int64)
+
+    def estimate(self, phrases: List[str]) -> np.ndarray:
+        """Document frequency of each phrase (an upper bound, exact unless hashes collide)"""
+        phrases = np.asarray(phrases, dtype=object)
+        if len(phrases) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return self._estimate(self._buckets(phrases))
+
+    def update(self, texts: Iterable) -> None:
+        """Count the n-grams of a chunk of texts, once per text"""
+        grams: List[str] = []
+        for text in texts:
+            if not isinstance(text, str):
+                continue
+            grams.extend(document_ngrams(text, self.ngram_range, self.stop_words))
+            self.documents += 1
+        if not grams:
+            return
+
+        codes, phrases = pd.factorize(np.asarray(grams, dtype=object))
+        counts = np.bincount(codes)
+        buckets = self._buckets(phrases)
+        for row, row_buckets in zip(self.sketch, buckets):
+            row += np.bincount(row_buckets, weights=counts, minlength=self.width).astype(np.uint32)
+
+        estimates = self._estimate(buckets)
+        keep = estimates >= self.min_df
+        self.candidates.update(zip(phrases[keep].tolist(), estimates[keep].tolist()))
+        if len(self.candidates) > 2 * self.max_phrases:
+            self.candidates = dict(self.top(self.max_phrases))
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Candidate phrases with their current document frequency, most frequent first"""
+        phrases = list(self.candidates)
+        ranked = pd.DataFrame({"phrase": phrases, "df": self.estimate(phrases)})
+        ranked = ranked[ranked["df"] >= self.min_df].sort_values(["df", "phrase"], ascending=[False, True])
+        return list(zip(ranked["phrase"].tolist()[:limit], ranked["df"].tolist()[:limit]))
+
+class PhraseIndex:
+    """
+    Inverted index from selected phrases to the postings that mention them.
+
+    Postings are numbered in stream order (0 .. n_documents - 1) and each
+    phrase's posting numbers are stored sorted in one flat array, CSR
+    style, next to a posting -> posted date array. Per-phrase counts by
+    month or by date bucket are then array operations instead of rescans
+    of the descriptions.
+    """
+
+    def __init__(self, phrases: List[str], indptr: np.ndarray, postings: np.ndarray, dates: np.ndarray):
+        self.phrases = phrases
+        self.phrase_ids = {phrase: i for i, phrase in enumerate(phrases)}
+        self.indptr = indptr
+        self.postings = postings
+        self.dates = dates
+        # Phrase of every entry in `postings`, for grouped counts
+        self._owners = np.repeat(np.arange(len(phrases)), np.diff(indptr))
+
+    @property
+    def n_documents(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def build(cls, chunks: Iterable[pd.DataFrame], phrases: List[str],
+              ngram_range: Tuple[int, int] = NGRAM_RANGE, stop_words: Optional[frozenset] = None) -> "PhraseIndex":
+        """Index `phrases` over chunks with a `description` and optionally a `posted_date` column"""
+        stop_words = default_stop_words() if stop_words is None else stop_words
+        phrase_ids = {phrase: i for i, phrase in enumerate(phrases)}
+        owners: List[int] = []
+        postings: List[int] = []
+        dates: List[np.ndarray] = []
+        offset = 0
+        for chunk in chunks:
+            for row, text in enumerate(chunk['description'].to_numpy()):
+                if isinstance(text, str):
+                    for phrase in document_ngrams(text, ngram_range, stop_words) & phrase_ids.keys():
+                        owners.append(phrase_ids[phrase])
+                        postings.append(offset + row)
+            if 'posted_date' in chunk.columns:
+                dates.append(pd.to_datetime(chunk['posted_date'], errors='coerce').to_numpy(dtype='datetime64[ns]'))
+            else:
+                dates.append(np.full(len(chunk), np.datetime64('NaT'), dtype='datetime64[ns]'))
+            offset += len(chunk)
+
+        owners_array = np.asarray(owners, dtype=np.int64)
+        postings_array = np.asarray(postings, dtype=np.int64)
+        order = np.lexsort((postings_array, owners_array))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(owners_array, minlength=len(phrases)))])
+        all_dates = np.concatenate(dates) if dates else np.zeros(0, dtype='datetime64[ns]')
+        return cls(list(phrases), indptr, postings_array[order], all_dates)
+
+    def ids(self, phrases: List[str]) -> np.ndarray:
+        """Index positions of phrases, -1 for phrases not indexed"""
+        return np.array([self.phrase_ids.get(phrase, -1) for phrase in phrases], dtype=np.int64)
+
+    def monthly_counts(self) -> Tuple[List[pd.Timestamp], np.ndarray, np.ndarray]:
+        """
+        Consecutive months from the first to the last posted date, a (phrases x months)
+        array of postings mentioning each phrase, and the number of postings per month
+        """
+        months = self.dates.astype('datetime64[M]')
+        dated = ~np.isnat(months)
+        if not dated.any():
+            return [], np.zeros((len(self.phrases), 0), dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first = months[dated].min()
+        n_months = int((months[dated].max() - first).astype(np.int64)) + 1
+        columns = np.where(dated, (months - first).astype(np.int64), -1)
+        totals = np.bincount(columns[dated], minlength=n_months)
+
+        counts = np.zeros((len(self.phrases), n_months), dtype=np.int64)
+        posting_columns = columns[self.postings]
+        known = posting_columns >= 0
+        np.add.at(counts, (self._owners[known], posting_columns[known]), 1)
+        axis = first + np.arange(n_months)
+        return [pd.Timestamp(month) for month in axis], counts, totals
+
+    def bucket_counts(self, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (phrases x buckets) mentions and postings per bucket when postings are
+        split into `buckets` equal runs in stream order, for data without dates
+        """
+        buckets = max(1, min(buckets, max(self.n_documents, 1)))
+        bucket_of = np.arange(self.n_documents) * buckets // max(self.n_documents, 1)
+        counts = np.zeros((len(self.phrases), buckets), dtype=np.int64)
+        np.add.at(counts, (self._owners, bucket_of[self.postings]), 1)
+        return counts, np.bincount(bucket_of, minlength=buckets)
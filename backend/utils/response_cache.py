@@ -0,0 +1,101 @@
+"""
+Versioned LRU cache for computed API responses
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+from utils.job_store import JobStore, get_job_store
+
+# Maximum number of cached responses across all endpoints
+RESPONSE_CACHE_SIZE = int(os.environ.get("M2M_RESPONSE_CACHE_SIZE", "256"))
+
+def _freeze(value: Any) -> Hashable:
+    """Turn query parameters (lists, dicts) into a hashable key"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class ResponseCache:
+    """
+    Caches endpoint results keyed by (endpoint, params, dataset version).
+
+    The dataset version is part of every key, so a reload can never serve
+    a stale response; entries of older versions are dropped as soon as the
+    store swaps in a new one. Cached values are shared between requests and
+    must not be mutated.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.store = store or get_job_store()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.store.add_listener(lambda data: self.invalidate(keep_version=data.version))
+
+    def get_or_compute(self, endpoint: str, params: Dict[str, Any], compute: Callable[[], Any]) -> Any:
+        """Return the cached response for these parameters, computing and storing it on a miss"""
+        key = (self.store.version, endpoint, _freeze(params))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            # A reload during compute() makes this result stale before it is stored
+            if key[0] == self.store.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, keep_version: Optional[int] = None):
+        """Drop all entries, or only those not computed from `keep_version`"""
+        with self._lock:
+            stale = [key for key in self._entries if key[0] != keep_version]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            endpoints: Dict[str, int] = {}
+            for _, endpoint, _ in self._entries:
+                endpoints[endpoint] = endpoints.get(endpoint, 0) + 1
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries_by_endpoint": endpoints,
+            }
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide ResponseCache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
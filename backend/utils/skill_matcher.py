@@ -0,0 +1,99 @@
+"""
+Compiled multi-pattern keyword matcher for extracting skills from free text
+"""
+
+import re
+import numpy as np
+from typing import List, Dict, Iterable, Tuple, Optional
+
+# Characters that make a match part of a longer word ("java" in "javascript")
+_WORD_CHARS = "a-z0-9"
+
+# Characters before which a capitalized word may just start a sentence
+_SENTENCE_ENDS = (".", "!", "?")
+
+class SkillMatcher:
+    """
+    Matches every keyword of a dictionary against text in a single regex pass.
+
+    Keywords are compiled into a character trie expressed as one regular
+    expression, so each text is scanned once regardless of dictionary size
+    and overlapping keywords ("react" / "react native") resolve to the
+    longest match. Matches must not touch other letters or digits, which
+    rules out hits such as "java" inside "javascript" or "go" inside "good".
+
+    `exact_keywords` are skill names that are also ordinary words ("Go",
+    "Spring", "Express"). They only match as written, case included, and
+    not as the first word of a sentence, so "go to market" or "Spring
+    hiring starts now." are not mentions of the skill.
+    """
+
+    def __init__(self, keywords: Iterable[str], exact_keywords: Iterable[str] = ()):
+        folded = list(dict.fromkeys(k.lower().strip() for k in keywords if k and k.strip()))
+        exact = [k for k in dict.fromkeys(k.strip() for k in exact_keywords if k and k.strip()) if k not in folded]
+        self.keywords = folded + exact
+        self.keyword_ids: Dict[str, int] = {k: i for i, k in enumerate(self.keywords)}
+        self.pattern = re.compile(
+            f"(?<![{_WORD_CHARS}])({self._trie_regex(self._build_trie(folded))})(?![{_WORD_CHARS}])"
+        ) if folded else None
+        word_chars = _WORD_CHARS + "A-Z"
+        self.exact_pattern = re.compile(
+            f"(?<![{word_chars}])({self._trie_regex(self._build_trie(exact))})(?![{word_chars}])"
+        ) if exact else None
+
+    @staticmethod
+    def _build_trie(keywords: List[str]) -> Dict:
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        return trie
+
+    @classmethod
+    def _trie_regex(cls, node: Dict) -> str:
+        """Turn a trie node into a regex; optional tails are greedy so longer keywords win"""
+        terminal = "" in node
+        branches = [re.escape(ch) + cls._trie_regex(child)
+                    for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    def find_ids(self, text: str) -> List[int]:
+        """Keyword IDs found in the text, deduplicated in order of first occurrence"""
+        if not text:
+            return []
+        ids = self.keyword_ids
+        found = [ids[m] for m in self.pattern.findall(text.lower())] if self.pattern is not None else []
+        if self.exact_pattern is not None:
+            exact = [(m.start(), ids[m.group(1)]) for m in self.exact_pattern.finditer(text)
+                     if not self._starts_sentence(text, m.start())]
+            if exact:
+                # Interleave with the case-folded hits by position to keep first-occurrence order
+                positions = [m.start() for m in self.pattern.finditer(text.lower())] if self.pattern is not None else []
+                found = [i for _, i in sorted(list(zip(positions, found)) + exact)]
+        return list(dict.fromkeys(found))
+
+    @staticmethod
+    def _starts_sentence(text: str, start: int) -> bool:
+        before = text[max(0, start - 16):start].rstrip()
+        return (not before and start <= 16) or before.endswith(_SENTENCE_ENDS)
+
+    def find(self, text: str) -> List[str]:
+        """Keywords found in the text, deduplicated in order of first occurrence"""
+        return [self.keywords[i] for i in self.find_ids(text)]
+
+    def find_batch_ids(self, texts: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Match an array of texts and return flat (text index, keyword ID) arrays"""
+        rows: List[int] = []
+        ids: List[int] = []
+        for row, text in enumerate(texts):
+            if not isinstance(text, str):
+                continue
+            found = self.find_ids(text)
+            rows.extend([row] * len(found))
+            ids.extend(found)
+        return np.asarray(rows, dtype=np.int64), np.asarray(ids, dtype=np.int64)
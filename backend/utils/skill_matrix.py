@@ -0,0 +1,219 @@
+"""
+Sparse job x skill incidence matrix used as the core analytics structure
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from typing import List, Optional, Tuple
+from utils.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+from utils.columnar_cache import explode_skills
+
+class SkillMatrix:
+    """
+    Skills parsed once into integer IDs and stored as CSR matrices.
+
+    Rows are job postings (in DataFrame order), columns are canonical skill
+    IDs from the skill taxonomy. `skills` holds the comma-separated `skills`
+    column and `description_skills` holds skills mentioned in descriptions;
+    `combined` is their sum. Location, title and month code arrays align
+    with the rows so grouped counts are a sparse product instead of a
+    Python loop.
+    """
+
+    def __init__(self, skill_names: List[str], skills: sparse.csr_matrix,
+                 description_skills: sparse.csr_matrix,
+                 location_codes: np.ndarray, locations: List[str],
+                 title_codes: np.ndarray, titles: List[str],
+                 month_codes: np.ndarray, months: List[pd.Timestamp]):
+        self.skill_names = skill_names
+        self.skills = skills
+        self.description_skills = description_skills
+        self.location_codes = location_codes
+        self.locations = locations
+        self.title_codes = title_codes
+        self.titles = titles
+        self.month_codes = month_codes
+        self.months = months
+        self.combined = (skills + description_skills).tocsr()
+
+    @property
+    def n_jobs(self) -> int:
+        return self.skills.shape[0]
+
+    @property
+    def n_skills(self) -> int:
+        return len(self.skill_names)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, skill_pairs: Optional[pd.DataFrame] = None) -> "SkillMatrix":
+        """
+        Parse the skills and description columns once and build the matrices.
+
+        `skill_pairs` is an already exploded (job, skill) frame, such as the
+        one stored in the columnar snapshot; without it the skills column is
+        split here.
+        """
+        taxonomy = get_skill_taxonomy()
+        n_jobs = len(df)
+
+        if skill_pairs is None:
+            skill_pairs = explode_skills(df)
+        skill_rows, skill_ids = cls._resolve_skill_pairs(skill_pairs, taxonomy)
+
+        desc_rows = np.array([], dtype=np.int64)
+        desc_ids = np.array([], dtype=np.int64)
+        if 'description' in df.columns:
+            desc_rows, desc_ids = taxonomy.extract_ids_batch(df['description'].to_numpy())
+
+        # Snapshot the ID space: skills interned later by other loads are out of range here
+        skill_names = list(taxonomy.names)
+        n_skills = len(skill_names)
+        skills = cls._incidence(skill_rows, skill_ids, n_jobs, n_skills)
+        description_skills = cls._incidence(desc_rows, desc_ids, n_jobs, n_skills)
+
+        location_codes, locations = cls._factorize(df, 'location')
+        title_codes, titles = cls._factorize(df, 'title')
+        month_codes, months = cls._month_codes(df)
+
+        return cls(skill_names, skills, description_skills,
+                   location_codes, locations, title_codes, titles,
+                   month_codes, months)
+
+    @staticmethod
+    def _resolve_skill_pairs(skill_pairs: pd.DataFrame, taxonomy: SkillTaxonomy) -> Tuple[np.ndarray, np.ndarray]:
+        """Map (job, skill name) pairs to (row, canonical skill ID) arrays"""
+        if len(skill_pairs) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        # Resolve each distinct spelling once, then map every occurrence by code
+        skills = pd.Categorical(skill_pairs['skill'])
+        remap = np.array([taxonomy.intern(str(name)) for name in skills.categories], dtype=np.int64)
+        rows = skill_pairs['job'].to_numpy(dtype=np.int64)
+        return rows, remap[skills.codes]
+
+    @staticmethod
+    def _incidence(rows: np.ndarray, ids: np.ndarray, n_jobs: int, n_skills: int) -> sparse.csr_matrix:
+        data = np.ones(len(rows), dtype=np.int32)
+        # Duplicate (row, skill) pairs are summed, matching Counter semantics
+        return sparse.csr_matrix((data, (rows, ids)), shape=(n_jobs, n_skills), dtype=np.int32)
+
+    @staticmethod
+    def _factorize(df: pd.DataFrame, column: str) -> Tuple[np.ndarray, List[str]]:
+        """Categorical codes in order of first appearance (-1 for missing)"""
+        if column not in df.columns:
+            return np.full(len(df), -1, dtype=np.int64), []
+        codes, uniques = pd.factorize(df[column], sort=False)
+        return codes.astype(np.int64), [str(u) for u in uniques]
+
+    @staticmethod
+    def _month_codes(df: pd.DataFrame) -> Tuple[np.ndarray, List[pd.Timestamp]]:
+        """Chronologically ordered month codes (-1 where the date is unparseable)"""
+        if 'posted_date' not in df.columns:
+            return np.full(len(df), -1, dtype=np.int64), []
+        dates = pd.to_datetime(df['posted_date'], errors='coerce')
+        periods = dates.dt.to_period('M')
+        valid = periods.notna().to_numpy()
+        ordinals = np.where(valid, periods.array.asi8, 0)
+        unique_ordinals = np.unique(ordinals[valid])
+        codes = np.full(len(df), -1, dtype=np.int64)
+        codes[valid] = np.searchsorted(unique_ordinals, ordinals[valid])
+        months = [pd.Period(ordinal=int(o), freq='M').to_timestamp() for o in unique_ordinals]
+        return codes, months
+
+    def append(self, other: "SkillMatrix") -> "SkillMatrix":
+        """New matrix with `other`'s rows after this one's (neither input is modified)"""
+        skill_names = other.skill_names if other.n_skills >= self.n_skills else self.skill_names
+        n_skills = len(skill_names)
+
+        def widen(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+            matrix = matrix.copy()
+            matrix.resize((matrix.shape[0], n_skills))
+            return matrix
+
+        skills = sparse.vstack([widen(self.skills), widen(other.skills)], format='csr')
+        description_skills = sparse.vstack([widen(self.description_skills), widen(other.description_skills)],
+                                           format='csr')
+
+        location_codes, locations = self._merge_codes(self.location_codes, self.locations,
+                                                      other.location_codes, other.locations)
+        title_codes, titles = self._merge_codes(self.title_codes, self.titles,
+                                                other.title_codes, other.titles)
+
+        # Months must stay chronological, so both sides are re-coded against the merged list
+        months = sorted(set(self.months) | set(other.months))
+        month_index = {month: i for i, month in enumerate(months)}
+        month_codes = np.concatenate([
+            self._recode(self.month_codes, [month_index[m] for m in self.months]),
+            self._recode(other.month_codes, [month_index[m] for m in other.months]),
+        ])
+
+        return SkillMatrix(skill_names, skills, description_skills,
+                           location_codes, locations, title_codes, titles,
+                           month_codes, months)
+
+    @classmethod
+    def _merge_codes(cls, codes: np.ndarray, labels: List[str],
+                     other_codes: np.ndarray, other_labels: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Concatenate two code arrays, appending labels only the second side has"""
+        merged = list(labels)
+        index = {label: i for i, label in enumerate(merged)}
+        remap = []
+        for label in other_labels:
+            if label not in index:
+                index[label] = len(merged)
+                merged.append(label)
+            remap.append(index[label])
+        return np.concatenate([codes, cls._recode(other_codes, remap)]), merged
+
+    @staticmethod
+    def _recode(codes: np.ndarray, remap: List[int]) -> np.ndarray:
+        result = np.full(len(codes), -1, dtype=np.int64)
+        valid = codes >= 0
+        if len(remap):
+            result[valid] = np.asarray(remap, dtype=np.int64)[codes[valid]]
+        return result
+
+    def group_counts(self, codes: np.ndarray, n_groups: int,
+                     matrix: Optional[sparse.csr_matrix] = None) -> sparse.csr_matrix:
+        """Sum skill rows per group code in one sparse product (groups x skills)"""
+        if matrix is None:
+            matrix = self.skills
+        valid = np.flatnonzero(codes >= 0)
+        grouping = sparse.csr_matrix(
+            (np.ones(len(valid), dtype=np.int32), (codes[valid], valid)),
+            shape=(n_groups, self.n_jobs)
+        )
+        return (grouping @ matrix).tocsr()
+
+    def skill_totals(self, include_descriptions: bool = True) -> np.ndarray:
+        """Total mentions per skill ID"""
+        matrix = self.combined if include_descriptions else self.skills
+        return np.asarray(matrix.sum(axis=0)).ravel()
+
+    @staticmethod
+    def top_k(counts: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k largest non-zero counts, ties broken by skill ID"""
+        nonzero = np.flatnonzero(counts > 0)
+        if len(nonzero) == 0:
+            return nonzero
+        order = np.argsort(-counts[nonzero], kind='stable')
+        return nonzero[order[:k]]
+
+    @staticmethod
+    def top_k_rows(counts: sparse.csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Top k non-zero entries of every row at once, ties broken by skill ID.
+
+        Returns flat (row, skill ID, count) arrays ordered by row and rank,
+        so each row's top k is a contiguous slice.
+        """
+        coo = counts.tocoo()
+        keep = coo.data > 0
+        rows, cols, data = coo.row[keep], coo.col[keep], coo.data[keep]
+        order = np.lexsort((cols, -data, rows))
+        rows, cols, data = rows[order], cols[order], data[order]
+        # Rank of each entry within its row: position minus the row's first position
+        starts = np.searchsorted(rows, rows, side='left')
+        keep = (np.arange(len(rows)) - starts) < k
+        return rows[keep].astype(np.int64), cols[keep].astype(np.int64), data[keep]
@@ -0,0 +1,156 @@
+"""
+Canonical skill taxonomy with an alias index and compact integer skill IDs
+"""
+
+import json
+import os
+import re
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from utils.skill_matcher import SkillMatcher
+
+SKILL_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "skill_taxonomy.json")
+
+# Separators ignored when comparing skill names ("Node.js" == "nodejs" == "node js")
+_SEPARATORS = re.compile(r"[\s._\-/]+")
+
+# Raw-string lookups are memoized up to this many distinct inputs
+_LOOKUP_CACHE_SIZE = 50000
+
+class SkillTaxonomy:
+    """
+    Maps every known spelling of a skill to one canonical integer ID.
+
+    IDs are positions in `names`; entries loaded from the taxonomy file come
+    first, and skills seen in job data that the file does not know about are
+    interned after them so every skill still gets a stable ID for the life
+    of the process.
+
+    Spellings an entry lists as `ambiguous` are ordinary English words too
+    ("Go", "Spring", "AI"). Lookups of skills-column values still resolve
+    them, but in free text they only match as written (see SkillMatcher).
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self._lock = threading.Lock()
+        self.names: List[str] = []
+        self.aliases: List[List[str]] = []
+        self.alias_index: Dict[str, int] = {}
+        self.ambiguous: Dict[str, int] = {}
+        self._lookup_cache: Dict[str, Optional[int]] = {}
+        self._matcher: Optional[SkillMatcher] = None
+        self._keyword_skill_ids: Optional[np.ndarray] = None
+
+        for entry in entries:
+            skill_id = self._add(entry["name"], entry.get("aliases", []))
+            for spelling in entry.get("ambiguous", []):
+                self.ambiguous.setdefault(spelling, skill_id)
+        self.curated_count = len(self.names)
+
+    @classmethod
+    def load(cls, path: str = SKILL_TAXONOMY_PATH) -> "SkillTaxonomy":
+        """Load the taxonomy file (an empty taxonomy if it is missing or invalid)"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f).get("skills", []))
+        except Exception as e:
+            print(f"Error loading skill taxonomy: {e}")
+            return cls([])
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Index key for a skill spelling"""
+        return _SEPARATORS.sub("", name.lower())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def curated_names(self) -> List[str]:
+        """Canonical names defined in the taxonomy file"""
+        return self.names[:self.curated_count]
+
+    def _add(self, name: str, aliases: Iterable[str]) -> int:
+        skill_id = len(self.names)
+        self.names.append(name)
+        self.aliases.append([name] + list(aliases))
+        for alias in self.aliases[skill_id]:
+            self.alias_index.setdefault(self.normalize(alias), skill_id)
+        return skill_id
+
+    def lookup(self, name: str) -> Optional[int]:
+        """Canonical ID for any known spelling, or None"""
+        if name in self._lookup_cache:
+            return self._lookup_cache[name]
+        skill_id = self.alias_index.get(self.normalize(name))
+        if len(self._lookup_cache) >= _LOOKUP_CACHE_SIZE:
+            self._lookup_cache.clear()
+        self._lookup_cache[name] = skill_id
+        return skill_id
+
+    def intern(self, name: str) -> int:
+        """Canonical ID for a spelling, registering it as a new skill if unknown"""
+        skill_id = self.lookup(name)
+        if skill_id is not None:
+            return skill_id
+        with self._lock:
+            skill_id = self.alias_index.get(self.normalize(name))
+            if skill_id is None:
+                skill_id = self._add(name.strip(), [])
+            self._lookup_cache.pop(name, None)
+            return skill_id
+
+    def canonical(self, name: str) -> str:
+        """Canonical display name for a spelling (the input itself if unknown)"""
+        skill_id = self.lookup(name)
+        return self.names[skill_id] if skill_id is not None else name
+
+    @property
+    def matcher(self) -> SkillMatcher:
+        """Free-text matcher over every curated name and alias, ambiguous ones matched as written"""
+        if self._matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    folded = {spelling.lower().strip() for spelling in self.ambiguous}
+                    keywords: Dict[str, int] = {}
+                    for skill_id in range(self.curated_count):
+                        for alias in self.aliases[skill_id]:
+                            if alias.lower().strip() not in folded:
+                                keywords.setdefault(alias.lower().strip(), skill_id)
+                    matcher = SkillMatcher(keywords, self.ambiguous)
+                    skill_ids = dict(keywords, **self.ambiguous)
+                    self._keyword_skill_ids = np.array([skill_ids[k] for k in matcher.keywords], dtype=np.int64)
+                    self._matcher = matcher
+        return self._matcher
+
+    def extract_ids(self, text: str) -> List[int]:
+        """Canonical skill IDs mentioned in free text, in order of first mention"""
+        matcher = self.matcher
+        return list(dict.fromkeys(int(self._keyword_skill_ids[k]) for k in matcher.find_ids(text)))
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skill names mentioned in free text"""
+        return [self.names[i] for i in self.extract_ids(text)]
+
+    def extract_ids_batch(self, texts: Iterable[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Match an array of texts and return flat (text index, skill ID) arrays"""
+        rows, keyword_ids = self.matcher.find_batch_ids(texts)
+        skill_ids = self._keyword_skill_ids[keyword_ids]
+        if len(rows) == 0:
+            return rows, skill_ids
+        # Aliases of the same skill found in one text collapse to a single hit
+        pairs = np.unique(np.stack([rows, skill_ids], axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
+
+_taxonomy: Optional[SkillTaxonomy] = None
+_taxonomy_lock = threading.Lock()
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Get the process-wide taxonomy, loading it on first use"""
+    global _taxonomy
+    if _taxonomy is None:
+        with _taxonomy_lock:
+            if _taxonomy is None:
+                _taxonomy = SkillTaxonomy.load()
+    return _taxonomy
@@ -0,0 +1,304 @@
+"""
+Background tasks for long-running analyses, with results persisted in SQLite
+"""
+
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Set
+from utils.data_loader import DATA_DIR
+from utils.job_store import get_job_store
+
+TASK_DB_PATH = os.environ.get("M2M_TASK_DB", os.path.join(DATA_DIR, "cache", "tasks.db"))
+
+# Worker threads running queued tasks
+TASK_WORKERS = int(os.environ.get("M2M_TASK_WORKERS", "2"))
+
+# Finished tasks older than this many seconds are deleted on startup
+TASK_RETENTION_SECONDS = float(os.environ.get("M2M_TASK_RETENTION", str(7 * 24 * 3600)))
+
+# A running task's lease is renewed every third of this; a task whose lease ran out
+# (or whose owning process is gone) is requeued by any process sharing the database
+TASK_LEASE_SECONDS = float(os.environ.get("M2M_TASK_LEASE", "60"))
+
+TERMINAL_STATUSES = ("done", "failed")
+
+# A handler gets the task's parameters and a progress callback(fraction, message)
+TaskHandler = Callable[[Dict[str, Any], Callable[[float, str], None]], Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    data_fingerprint TEXT,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner_pid INTEGER,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status);
+"""
+
+# Columns added after the first release, for databases created before them
+_ADDED_COLUMNS = {"owner_pid": "INTEGER", "lease_until": "REAL"}
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this pid still runs on this host (assumed alive where that cannot be checked)"""
+    if not pid or pid == os.getpid():
+        # Our own pid on a row we did not claim belongs to an earlier process
+        return False
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+_STATUS_COLUMNS = ["id", "kind", "params", "data_fingerprint", "status", "progress", "message",
+                   "error", "created_at", "started_at", "finished_at"]
+
+class TaskManager:
+    """
+    Runs registered analyses on background threads.
+
+    A task's ID hashes its kind, parameters and the fingerprint of the
+    data it runs on, so resubmitting the same request (e.g. a client
+    retry) returns the existing task instead of starting the work again;
+    after a reload the same request becomes a new task. Status and
+    results are kept in a local SQLite file, so finished results survive
+    restarts and tasks that were queued or running are picked up again.
+    
+    Several worker processes may share the file. A task is claimed with a
+    conditional update, so only one process runs it, and the claim carries
+    the owner's pid and a lease that a heartbeat thread renews. A running
+    task is requeued only once its lease has expired or its owner has
+    exited, never while a live sibling is still working on it.
+    """
+
+    def __init__(self, db_path: str = TASK_DB_PATH, workers: int = TASK_WORKERS):
+        self.db_path = db_path
+        self.workers = max(workers, 1)
+        self._handlers: Dict[str, TaskHandler] = {}
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._running: Set[str] = set()
+        self._stop_heartbeat = threading.Event()
+        self._started = False
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(tasks)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {column_type}")
+            conn.execute("DELETE FROM tasks WHERE status IN ('done', 'failed') AND finished_at < ?",
+                         (time.time() - TASK_RETENTION_SECONDS,))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def register(self, kind: str, handler: TaskHandler):
+        """Make `handler` available for tasks of `kind`"""
+        self._handlers[kind] = handler
+
+    def start(self):
+        """Start the worker threads and pick up queued tasks and those abandoned by a dead process"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            with self._connect() as conn:
+                queued = [row["id"] for row in conn.execute(
+                    "SELECT id FROM tasks WHERE status = 'queued' ORDER BY created_at")]
+            # Other processes may pick up the same queued tasks; claiming decides who runs them
+            for task_id in queued + self._requeue_abandoned():
+                self._queue.put(task_id)
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"m2m-task-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._stop_heartbeat.clear()
+            heartbeat = threading.Thread(target=self._heartbeat, name="m2m-task-heartbeat", daemon=True)
+            heartbeat.start()
+            self._threads.append(heartbeat)
+
+    def stop(self):
+        """Ask the worker threads to exit after their current task"""
+        self._stop_heartbeat.set()
+        for _ in range(self.workers):
+            self._queue.put("")
+        self._threads = []
+        self._started = False
+
+    def _requeue_abandoned(self) -> List[str]:
+        """Return running tasks whose lease expired or whose owner exited to the queue; their IDs"""
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, owner_pid, lease_until FROM tasks WHERE status = 'running' "
+                                "ORDER BY created_at").fetchall()
+            requeued = []
+            for row in rows:
+                if row["id"] in self._running:
+                    continue
+                expired = row["lease_until"] is None or row["lease_until"] < now
+                if not expired and _process_alive(row["owner_pid"]):
+                    continue
+                # Conditional on the same owner and lease, so only one process requeues it
+                cursor = conn.execute(
+                    "UPDATE tasks SET status = 'queued', progress = 0, owner_pid = NULL, lease_until = NULL "
+                    "WHERE id = ? AND status = 'running' AND owner_pid IS ? AND lease_until IS ?",
+                    (row["id"], row["owner_pid"], row["lease_until"]))
+                if cursor.rowcount == 1:
+                    requeued.append(row["id"])
+        return requeued
+
+    def _heartbeat(self):
+        """Renew the leases of tasks running here and recover tasks abandoned elsewhere"""
+        while not self._stop_heartbeat.wait(TASK_LEASE_SECONDS / 3):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                if running:
+                    with self._connect() as conn:
+                        conn.executemany(
+                            "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = 'running' AND owner_pid = ?",
+                            [(time.time() + TASK_LEASE_SECONDS, task_id, os.getpid()) for task_id in running])
+                for task_id in self._requeue_abandoned():
+                    self._queue.put(task_id)
+            except Exception as e:
+                print(f"Error renewing task leases: {e}")
+
+    @staticmethod
+    def task_id(kind: str, params: Dict[str, Any], fingerprint: str) -> str:
+        payload = json.dumps({"kind": kind, "params": params, "data": fingerprint}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a task, or return the existing one for identical parameters and data"""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown task kind '{kind}'")
+        self.start()
+        fingerprint = get_job_store().data.fingerprint
+        task_id = self.task_id(kind, params, fingerprint)
+
+        with self._lock:
+            with self._connect() as conn:
+                row = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                # Failed tasks are retried; anything else is deduplicated
+                enqueue = row is None or row["status"] == "failed"
+                if enqueue:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO tasks (id, kind, params, data_fingerprint, status, progress, "
+                        "created_at) VALUES (?, ?, ?, ?, 'queued', 0, ?)",
+                        (task_id, kind, json.dumps(params), fingerprint, time.time()))
+            # Only after the commit, so a worker always finds the row
+            if enqueue:
+                self._queue.put(task_id)
+        return self.status(task_id)
+
+    def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task status without its result, or None if unknown"""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_STATUS_COLUMNS)} FROM tasks WHERE id = ?",
+                               (task_id,)).fetchone()
+        if row is None:
+            return None
+        status = dict(row)
+        status["params"] = json.loads(status["params"])
+        status["queue_position"] = self._queue_position(task_id) if status["status"] == "queued" else None
+        return status
+
+    def result(self, task_id: str) -> Any:
+        """Decoded result of a finished task (None while it is not done)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM tasks WHERE id = ? AND status = 'done'",
+                               (task_id,)).fetchone()
+        return json.loads(row["result"]) if row is not None and row["result"] is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        return {"workers": self.workers, "queue_depth": self._queue.qsize(), "tasks": counts}
+
+    def _queue_position(self, task_id: str) -> Optional[int]:
+        with self._queue.mutex:
+            pending = list(self._queue.queue)
+        return pending.index(task_id) if task_id in pending else None
+
+    def _update(self, task_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?", (*fields.values(), task_id))
+
+    def _work(self):
+        while True:
+            task_id = self._queue.get()
+            if not task_id:
+                return
+            try:
+                self._run(task_id)
+            except Exception as e:
+                print(f"Error running task {task_id}: {e}")
+
+    def _claim(self, task_id: str) -> bool:
+        """Atomically mark a queued task as running here; False if another worker got it first"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'running', started_at = ?, progress = 0, owner_pid = ?, lease_until = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, os.getpid(), now + TASK_LEASE_SECONDS, task_id))
+            if cursor.rowcount != 1:
+                return False
+            self._running.add(task_id)
+        return True
+
+    def _run(self, task_id: str):
+        if not self._claim(task_id):
+            return
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT kind, params FROM tasks WHERE id = ?", (task_id,)).fetchone()
+
+            def report(progress: float, message: str = ""):
+                self._update(task_id, progress=round(min(max(progress, 0.0), 1.0), 4), message=message)
+
+            try:
+                result = self._handlers[row["kind"]](json.loads(row["params"]), report)
+                self._update(task_id, status="done", progress=1.0, result=json.dumps(result, default=str),
+                             finished_at=time.time(), lease_until=None)
+            except Exception as e:
+                print(f"Task {task_id} ({row['kind']}) failed: {e}")
+                self._update(task_id, status="failed", error=str(e), finished_at=time.time(), lease_until=None)
+        finally:
+            with self._lock:
+                self._running.discard(task_id)
+
+_manager: Optional[TaskManager] = None
+_manager_lock = threading.Lock()
+
+def get_task_manager() -> TaskManager:
+    """Get the process-wide TaskManager, creating it on first use"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = TaskManager()
+    return _manager